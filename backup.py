@@ -0,0 +1,488 @@
+import os
+import gzip
+import json
+import time
+import shutil
+import sqlite3
+import asyncio
+import hashlib
+from datetime import datetime
+from config import BACKUP_DIR, DB_NAME
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def _snapshot(src_path, dest_path):
+    """Salinan konsisten database (termasuk isi -wal) lewat SQLite online backup API"""
+    src = sqlite3.connect(src_path)
+    dst = sqlite3.connect(dest_path)
+    try:
+        # Satu langkah (pages=-1): satu read transaction → snapshot konsisten. Di mode WAL reader
+        # tidak menahan writer, dan backup tidak di-restart walau ada commit di tengah jalan
+        src.backup(dst, pages=-1)
+        # Snapshot tidak perlu WAL: satu file utuh yang bisa langsung dipakai / dikompres
+        dst.execute("PRAGMA journal_mode=DELETE")
+        integrity = dst.execute("PRAGMA integrity_check").fetchone()[0]
+    finally:
+        dst.close()
+        src.close()
+    return integrity
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_checksum(path, sha256):
+    # Format sha256sum, jadi bisa dicek manual: sha256sum -c file.sha256
+    with open(path + ".sha256", "w") as f:
+        f.write(f"{sha256}  {os.path.basename(path)}\n")
+
+
+def _write_backup(src_path, dest_path):
+    start = time.perf_counter()
+    tmp_path = dest_path + ".tmp"
+    try:
+        integrity = _snapshot(src_path, tmp_path)
+        if integrity != "ok":
+            raise RuntimeError(f"integrity_check gagal: {integrity}")
+        raw_size = os.path.getsize(tmp_path)
+        with open(tmp_path, "rb") as src, gzip.open(dest_path, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    sha256 = _sha256_file(dest_path)
+    _write_checksum(dest_path, sha256)
+    return {
+        "path": dest_path,
+        "size": os.path.getsize(dest_path),
+        "raw_size": raw_size,
+        "sha256": sha256,
+        "integrity": integrity,
+        "duration_ms": (time.perf_counter() - start) * 1000,
+    }
+
+
+def _backup_path(prefix):
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{BACKUP_DIR}/{prefix}_{timestamp}.db.gz"
+
+
+async def create_backup(prefix="store_backup", db_path=DB_NAME):
+    """Backup terkompresi (.db.gz + .sha256) di BACKUP_DIR; dikerjakan di thread, event loop tidak ikut blocking"""
+    return await asyncio.to_thread(_write_backup, db_path, _backup_path(prefix))
+
+
+async def snapshot_db(dest_path, db_path=DB_NAME):
+    """Salinan .db biasa (tidak dikompres) yang konsisten, mis. untuk paket migrasi"""
+    integrity = await asyncio.to_thread(_snapshot, db_path, dest_path)
+    if integrity != "ok":
+        raise RuntimeError(f"integrity_check gagal: {integrity}")
+    return dest_path
+
+
+def _extract(path, dest_path):
+    # -wal / -shm sisa database lama akan ikut dibaca SQLite dan merusak file baru → buang
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(dest_path + suffix):
+            os.remove(dest_path + suffix)
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as src, open(dest_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+    else:
+        # Backup lama (.db mentah, mungkin masih mode WAL) → salin lewat backup API juga
+        _snapshot(path, dest_path)
+
+
+def _stage(path, dest_path):
+    """Cek checksum .sha256 (kalau ada), extract ke dest_path, lalu integrity_check; ValueError kalau rusak"""
+    sidecar = path + ".sha256"
+    if os.path.exists(sidecar):
+        with open(sidecar) as f:
+            expected = f.read().split()[0]
+        if _sha256_file(path) != expected:
+            raise ValueError("checksum sha256 tidak cocok")
+    try:
+        _extract(path, dest_path)
+        conn = sqlite3.connect(dest_path)
+        try:
+            integrity = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            conn.close()
+    except Exception as e:
+        raise ValueError(f"backup tidak bisa dibaca: {e}")
+    if integrity != "ok":
+        raise ValueError(f"integrity_check gagal: {integrity}")
+
+
+def _verify(path):
+    tmp_path = f"{path}.verify.tmp"
+    try:
+        _stage(path, tmp_path)
+    except ValueError as e:
+        return False, str(e)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return True, "ok"
+
+
+async def verify_backup(path):
+    """(ok, pesan): cek checksum .sha256 (kalau ada) lalu integrity_check isi backup"""
+    return await asyncio.to_thread(_verify, path)
+
+
+async def restore_database(db, path, pre_prefix="pre_restore"):
+    """Hot restore tanpa restart: verifikasi + extract backup di samping database, lalu tukar
+    file lewat db.replace_database. Bot hanya "berhenti" selama tukar file. Database lama
+    (lengkap sampai write terakhir) disimpan sebagai backup pre_prefix. Backup rusak →
+    ValueError, database tidak disentuh. State di memori (produk, tiket, dll) dimuat ulang
+    oleh pemanggil (bot.reload_state)"""
+    staged_path = db.db_name + ".restore"
+    try:
+        await asyncio.to_thread(_stage, path, staged_path)
+        return await _swap_in(db, staged_path, pre_prefix)
+    finally:
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
+
+
+async def reset_database(db, pre_prefix="pre_reset_backup"):
+    """Kosongkan database tanpa restart (file baru berisi tabel kosong) lewat jalur
+    yang sama dengan restore_database; database lama jadi backup pre_prefix"""
+    staged_path = db.db_name + ".reset"
+    try:
+        # Tabel dibuat dulu di file baru, jadi write yang masuk tepat setelah tukar tidak ketemu database kosong
+        fresh = type(db)(staged_path)
+        await fresh.init_db()
+        await fresh.close()
+        return await _swap_in(db, staged_path, pre_prefix)
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(staged_path + suffix):
+                os.remove(staged_path + suffix)
+
+
+async def _swap_in(db, staged_path, pre_prefix):
+    old_path = db.db_name + ".old"
+    downtime_ms = await db.replace_database(staged_path, old_path)
+    pre_restore = None
+    if os.path.exists(old_path):
+        # Dikompres setelah jeda selesai; file .old baru dihapus kalau backup berhasil
+        pre_restore = (await asyncio.to_thread(_write_backup, old_path, _backup_path(pre_prefix)))["path"]
+        os.remove(old_path)
+    return {
+        "pre_restore": pre_restore,
+        "size": os.path.getsize(db.db_name),
+        "downtime_ms": downtime_ms,
+    }
+
+
+# ─── Incremental (rantai per halaman) ────────────────────────────────────────
+#
+# Satu "link" = file gzip berisi header JSON satu baris lalu record
+# [nomor halaman 4 byte][isi halaman]. Link full berisi semua halaman, link
+# delta hanya halaman yang berubah sejak link sebelumnya (dibandingkan lewat
+# hash per halaman di pages.bin). Restore = terapkan full lalu delta berurutan
+# sampai titik yang diminta, dicek terhadap sha256 database di header.
+
+CHAIN_DIR = os.path.join(BACKUP_DIR, "chain")
+CHAIN_MANIFEST = os.path.join(CHAIN_DIR, "manifest.json")
+CHAIN_DIGESTS = os.path.join(CHAIN_DIR, "pages.bin")
+# Full snapshot baru setelah sekian delta (auto backup 6 jam → ±1 minggu per rantai)
+CHAIN_MAX_DELTAS = 27
+# Jumlah rantai (full + delta-deltanya) yang disimpan
+CHAIN_KEEP = 2
+DIGEST_SIZE = 16
+
+
+def _page_digests(path, page_size):
+    digests = bytearray()
+    with open(path, "rb") as f:
+        for page in iter(lambda: f.read(page_size), b""):
+            digests += hashlib.blake2b(page, digest_size=DIGEST_SIZE).digest()
+    return bytes(digests)
+
+
+def _write_json_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def load_chain():
+    """Manifest rantai: {"head": id link terakhir, "links": [...]} (urut lama → baru)"""
+    if not os.path.exists(CHAIN_MANIFEST):
+        return {"head": None, "links": []}
+    with open(CHAIN_MANIFEST) as f:
+        return json.load(f)
+
+
+def _write_incremental(src_path):
+    start = time.perf_counter()
+    os.makedirs(CHAIN_DIR, exist_ok=True)
+    # Mikrodetik: dua link dalam detik yang sama tidak boleh ber-id sama (parent == id → rantai berputar)
+    link_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    tmp_path = os.path.join(CHAIN_DIR, f"{link_id}.snapshot.tmp")
+    try:
+        integrity = _snapshot(src_path, tmp_path)
+        if integrity != "ok":
+            raise RuntimeError(f"integrity_check gagal: {integrity}")
+        conn = sqlite3.connect(tmp_path)
+        try:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        finally:
+            conn.close()
+        raw_size = os.path.getsize(tmp_path)
+        page_count = raw_size // page_size
+        digests = _page_digests(tmp_path, page_size)
+
+        manifest = load_chain()
+        links = manifest["links"]
+        last = links[-1] if links else None
+        if last and link_id <= last["id"]:
+            raise RuntimeError(f"Id link {link_id} tidak lebih baru dari head {last['id']} (jam mundur?)")
+        previous = None
+        if last and last["id"] == manifest["head"] and last["page_size"] == page_size and os.path.exists(CHAIN_DIGESTS):
+            with open(CHAIN_DIGESTS, "rb") as f:
+                previous = f.read()
+        deltas = 0
+        for link in reversed(links):
+            if link["type"] == "full":
+                break
+            deltas += 1
+
+        kind = "full"
+        pages = range(page_count)
+        if previous is not None and deltas < CHAIN_MAX_DELTAS:
+            changed = [
+                i for i in range(page_count)
+                if digests[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE] != previous[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE]
+            ]
+            # Delta yang hampir sebesar full tidak ada untungnya → mulai rantai baru
+            if len(changed) <= page_count // 2:
+                kind, pages = "delta", changed
+        header = {
+            "id": link_id,
+            "type": kind,
+            "parent": None if kind == "full" else last["id"],
+            "page_size": page_size,
+            "page_count": page_count,
+            "pages": len(pages),
+            "db_sha256": _sha256_file(tmp_path),
+            "created": datetime.now().isoformat(timespec="seconds"),
+        }
+        link_path = os.path.join(CHAIN_DIR, f"{link_id}.{kind}.gz")
+        with open(tmp_path, "rb") as src, gzip.open(link_path, "wb", compresslevel=6) as dst:
+            dst.write((json.dumps(header) + "\n").encode())
+            for page_no in pages:
+                src.seek(page_no * page_size)
+                dst.write(page_no.to_bytes(4, "big"))
+                dst.write(src.read(page_size))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    file_sha256 = _sha256_file(link_path)
+    _write_checksum(link_path, file_sha256)
+    with open(CHAIN_DIGESTS + ".tmp", "wb") as f:
+        f.write(digests)
+    os.replace(CHAIN_DIGESTS + ".tmp", CHAIN_DIGESTS)
+    link = {**header, "file": os.path.basename(link_path), "file_sha256": file_sha256, "size": os.path.getsize(link_path)}
+    links.append(link)
+    manifest["head"] = link_id
+    _prune_chain(manifest)
+    _write_json_atomic(CHAIN_MANIFEST, manifest)
+    return {**link, "path": link_path, "raw_size": raw_size, "integrity": integrity,
+            "duration_ms": (time.perf_counter() - start) * 1000}
+
+
+def _prune_chain(manifest):
+    fulls = [link["id"] for link in manifest["links"] if link["type"] == "full"]
+    if len(fulls) <= CHAIN_KEEP:
+        return
+    cutoff = fulls[-CHAIN_KEEP]
+    keep = []
+    for link in manifest["links"]:
+        if link["id"] >= cutoff:
+            keep.append(link)
+            continue
+        for path in (os.path.join(CHAIN_DIR, link["file"]), os.path.join(CHAIN_DIR, link["file"]) + ".sha256"):
+            if os.path.exists(path):
+                os.remove(path)
+    manifest["links"] = keep
+
+
+async def create_incremental_backup(db_path=DB_NAME):
+    """Tambah satu link ke rantai backup (full atau delta halaman yang berubah); di thread"""
+    return await asyncio.to_thread(_write_incremental, db_path)
+
+
+def _chain_to(target, links):
+    """Link-link (full → ... → target) untuk target: id link, "latest", atau datetime (titik waktu)"""
+    if not links:
+        raise ValueError("Rantai backup masih kosong")
+    if target in (None, "latest"):
+        chosen = links[-1]
+    elif isinstance(target, datetime):
+        candidates = [link for link in links if datetime.fromisoformat(link["created"]) <= target]
+        if not candidates:
+            raise ValueError(f"Tidak ada backup sebelum {target}")
+        chosen = candidates[-1]
+    else:
+        chosen = next((link for link in links if link["id"] == target), None)
+        if chosen is None:
+            raise ValueError(f"Link {target} tidak ada di rantai")
+    by_id = {link["id"]: link for link in links}
+    chain = [chosen]
+    visited = {chosen["id"]}
+    while chain[-1]["type"] != "full":
+        parent = by_id.get(chain[-1]["parent"])
+        if parent is None:
+            raise ValueError(f"Rantai putus: parent {chain[-1]['parent']} hilang")
+        if parent["id"] in visited:
+            raise ValueError(f"Rantai rusak: link {parent['id']} berulang (siklus parent)")
+        visited.add(parent["id"])
+        chain.append(parent)
+    return chain[::-1]
+
+
+def _apply_link(link, dest):
+    path = os.path.join(CHAIN_DIR, link["file"])
+    if _sha256_file(path) != link["file_sha256"]:
+        raise ValueError(f"Checksum {link['file']} tidak cocok")
+    page_size = link["page_size"]
+    with gzip.open(path, "rb") as src:
+        header = json.loads(src.readline())
+        if header["id"] != link["id"]:
+            raise ValueError(f"Header {link['file']} tidak cocok dengan manifest")
+        for _ in range(header["pages"]):
+            page_no = int.from_bytes(src.read(4), "big")
+            dest.seek(page_no * page_size)
+            dest.write(src.read(page_size))
+    dest.truncate(header["page_count"] * page_size)
+
+
+def restore_point(target, dest_path):
+    """Bangun ulang database pada titik `target` ke dest_path; diverifikasi sha256 + integrity_check"""
+    chain = _chain_to(target, load_chain()["links"])
+    tmp_path = dest_path + ".restore.tmp"
+    try:
+        with open(tmp_path, "w+b") as dest:
+            for link in chain:
+                _apply_link(link, dest)
+        if _sha256_file(tmp_path) != chain[-1]["db_sha256"]:
+            raise ValueError("Hasil restore tidak cocok dengan sha256 database di backup")
+        conn = sqlite3.connect(tmp_path)
+        try:
+            integrity = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            conn.close()
+        if integrity != "ok":
+            raise ValueError(f"integrity_check gagal: {integrity}")
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(dest_path + suffix):
+                os.remove(dest_path + suffix)
+        os.replace(tmp_path, dest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return chain[-1]
+
+
+def verify_chain():
+    """Cek setiap link: checksum file, lalu tiap rantai dibangun ulang dan sha256 database per link dicocokkan.
+    Return list (id, ok, pesan)"""
+    results = []
+    links = load_chain()["links"]
+    tmp_path = os.path.join(CHAIN_DIR, "verify.tmp")
+    try:
+        dest = None
+        previous_id = None
+        visited = set()
+        for link in links:
+            try:
+                if link["id"] in visited:
+                    raise ValueError("id link dobel di manifest")
+                visited.add(link["id"])
+                if link["type"] == "full":
+                    if dest:
+                        dest.close()
+                    dest = open(tmp_path, "w+b")
+                elif dest is None:
+                    raise ValueError("delta tanpa full di depannya")
+                elif link["parent"] != previous_id:
+                    raise ValueError(f"parent {link['parent']} bukan link sebelumnya ({previous_id})")
+                previous_id = link["id"]
+                _apply_link(link, dest)
+                dest.flush()
+                if _sha256_file(tmp_path) != link["db_sha256"]:
+                    raise ValueError("sha256 database tidak cocok")
+                results.append((link["id"], True, "ok"))
+            except Exception as e:
+                results.append((link["id"], False, str(e)))
+                if dest:
+                    dest.close()
+                dest = None
+                previous_id = None
+        if dest:
+            dest.close()
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return results
+
+
+def main():
+    """
+    Cara pakai (rantai incremental di backups/chain):
+      python3 backup.py list
+      python3 backup.py verify
+      python3 backup.py restore latest data/store_restore.db
+      python3 backup.py restore 20250101_060000_123456 data/store_restore.db
+      python3 backup.py restore "2025-01-01 12:00" data/store_restore.db   (titik waktu)
+
+    Restore ke file lain dulu, lalu ganti store.db saat bot mati (atau /restore).
+    """
+    import sys
+    args = sys.argv[1:]
+    if not args or args[0] not in ("list", "verify", "restore") or (args[0] == "restore" and len(args) != 3):
+        print(main.__doc__)
+        sys.exit(1)
+
+    if args[0] == "list":
+        links = load_chain()["links"]
+        if not links:
+            print("📝 Rantai backup masih kosong.")
+        for link in links:
+            print(f"{'📦' if link['type'] == 'full' else '  ↳'} {link['id']}  {link['type']:<5}  "
+                  f"{link['pages']}/{link['page_count']} halaman  {link['size'] / 1024:.1f} KB  {link['created']}")
+    elif args[0] == "verify":
+        results = verify_chain()
+        for link_id, ok, msg in results:
+            print(f"{'✅' if ok else '❌'} {link_id}: {msg}")
+        if not all(ok for _, ok, _ in results):
+            sys.exit(1)
+    else:
+        target = args[1]
+        try:
+            target = datetime.strptime(target, "%Y-%m-%d %H:%M")
+        except ValueError:
+            pass
+        try:
+            link = restore_point(target, args[2])
+        except ValueError as e:
+            print(f"❌ Restore gagal: {e}")
+            sys.exit(1)
+        print(f"✅ Database pada {link['created']} (link {link['id']}) ditulis ke {args[2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark — koneksi SQLite per panggilan vs ConnectionPool SimpleDB
+===================================================================
+Membandingkan latency per panggilan: cara lama (aiosqlite.connect() baru di
+setiap method, lalu ditutup) dengan SimpleDB yang memakai satu writer + pool
+reader yang dibuka sekali.
+
+Cara pakai (dari root repo):
+  python3 benchmarks/bench_db_pool.py
+  python3 benchmarks/bench_db_pool.py 1000      (jumlah panggilan per operasi)
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import aiosqlite
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import SimpleDB  # noqa: E402
+
+
+class ConnectPerCall:
+    """Pola lama: tiap method buka koneksi sendiri"""
+
+    def __init__(self, db_name):
+        self.db_name = db_name
+
+    async def is_blacklisted(self, user_id):
+        async with aiosqlite.connect(self.db_name) as db:
+            cursor = await db.execute("SELECT 1 FROM blacklist WHERE user_id = ?", (user_id,))
+            return await cursor.fetchone() is not None
+
+    async def get_user_summary(self, user_id):
+        async with aiosqlite.connect(self.db_name) as db:
+            cursor = await db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(total_price), 0) FROM transactions WHERE user_id = ?",
+                (user_id,),
+            )
+            row = await cursor.fetchone()
+            return {"count": row[0], "total": row[1]}
+
+    async def update_ticket_status(self, channel_id, status, payment_method=None):
+        async with aiosqlite.connect(self.db_name) as db:
+            await db.execute("UPDATE active_tickets SET status = ? WHERE channel_id = ?", (status, channel_id))
+            await db.commit()
+
+
+async def measure(func, n):
+    await func(0)
+    start = time.perf_counter()
+    for i in range(n):
+        await func(i)
+    return (time.perf_counter() - start) / n * 1000
+
+
+async def run(n):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_name = os.path.join(tmpdir, "bench.db")
+        pooled = SimpleDB(db_name)
+        await pooled.init_db()
+        await pooled.save_ticket("1", "42", [], 0)
+        old = ConnectPerCall(db_name)
+
+        print(f"{n} panggilan berurutan per operasi (ms per panggilan)")
+        print(f"{'':18}{'is_blacklisted':>16}{'get_user_summary':>18}{'update_ticket':>15}")
+        for name, db in (("connect-per-call", old), ("pooled", pooled)):
+            read = await measure(lambda i: db.is_blacklisted(str(i)), n)
+            summary = await measure(lambda i: db.get_user_summary("42"), n)
+            write = await measure(lambda i: db.update_ticket_status("1", "OPEN"), n)
+            print(f"{name:18}{read:16.3f}{summary:18.3f}{write:15.3f}")
+        await pooled.close()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    asyncio.run(run(n))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark — /history, /allhistory & daily summary di 500k transaksi
+===================================================================
+Membuat tabel transactions sintetis dengan skema lama (tanpa index, timestamp
+TEXT), mengukur query lama, lalu menjalankan migrasi SimpleDB.init_db (index +
+ts_epoch + backfill) dan mengukur query yang sekarang dipakai bot.
+
+Cara pakai (dari root repo):
+  python3 benchmarks/bench_history.py
+  python3 benchmarks/bench_history.py 100000     (jumlah transaksi)
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import tempfile
+import aiosqlite
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import SimpleDB  # noqa: E402
+
+USERS = 20000
+USER_ID = "42"
+
+
+def create_old_table(db_name, rows):
+    rnd = random.Random(1)
+    now = datetime.now()
+    items = json.dumps([{"id": 1, "name": "Nitro", "price": 75000, "qty": 1}])
+    conn = sqlite3.connect(db_name)
+    conn.execute('''CREATE TABLE transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        invoice TEXT,
+        user_id TEXT,
+        items TEXT,
+        total_price INTEGER,
+        payment_method TEXT,
+        timestamp TEXT
+    )''')
+    conn.executemany(
+        "INSERT INTO transactions (invoice, user_id, items, total_price, payment_method, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (
+                f"INV-{i}", str(rnd.randint(1, USERS)), items, 75000, rnd.choice(["QRIS", "DANA", "BCA"]),
+                (now - timedelta(seconds=rnd.randint(0, 365 * 86400))).isoformat(),
+            )
+            for i in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+class OldQueries:
+    """Query sebelum migrasi: ORDER BY timestamp TEXT, statistik dari seluruh tabel"""
+
+    def __init__(self, db_name):
+        self.db_name = db_name
+
+    async def _fetch(self, sql, params=()):
+        async with aiosqlite.connect(self.db_name) as db:
+            db.row_factory = aiosqlite.Row
+            cursor = await db.execute(sql, params)
+            rows = await cursor.fetchall()
+        return [
+            {**dict(row), "items": json.loads(row["items"]), "timestamp": datetime.fromisoformat(row["timestamp"])}
+            for row in rows
+        ]
+
+    async def user_transactions(self, user_id, limit):
+        return await self._fetch(
+            "SELECT * FROM transactions WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?", (user_id, limit)
+        )
+
+    async def history(self):
+        await self.user_transactions(USER_ID, 5)
+        await self.user_transactions(USER_ID, 1000)
+
+    async def allhistory(self):
+        await self.user_transactions(USER_ID, 1000)
+
+    async def daily(self):
+        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+        rows = await self._fetch("SELECT * FROM transactions ORDER BY timestamp DESC")
+        return [t for t in rows if t["timestamp"].strftime("%Y-%m-%d") == yesterday]
+
+
+class NewQueries:
+    def __init__(self, db):
+        self.db = db
+
+    async def history(self):
+        await self.db.get_user_transactions(USER_ID, 5)
+        await self.db.get_user_summary(USER_ID)
+
+    async def allhistory(self):
+        await self.db.get_user_summary(USER_ID)
+        await self.db.get_user_transactions(USER_ID, 10)
+
+    async def daily(self):
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        await self.db.aggregate_sales(today - timedelta(days=1), today, group_by="payment_method")
+
+
+async def measure(func, n):
+    await func()
+    start = time.perf_counter()
+    for _ in range(n):
+        await func()
+    return (time.perf_counter() - start) / n * 1000
+
+
+async def report(name, queries):
+    history = await measure(queries.history, 5)
+    allhistory = await measure(queries.allhistory, 5)
+    daily = await measure(queries.daily, 2)
+    print(f"{name:8}{history:12.1f}{allhistory:14.1f}{daily:16.1f}")
+
+
+async def run(rows):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_name = os.path.join(tmpdir, "bench.db")
+        print(f"Membuat {rows} transaksi sintetis ({USERS} user)...")
+        create_old_table(db_name, rows)
+
+        print(f"{'(ms)':8}{'/history':>12}{'/allhistory':>14}{'daily summary':>16}")
+        await report("before", OldQueries(db_name))
+
+        db = SimpleDB(db_name)
+        start = time.perf_counter()
+        await db.init_db()
+        migration = time.perf_counter() - start
+        await report("after", NewQueries(db))
+        await db.close()
+        print(f"Migrasi + backfill: {migration:.1f} s")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    asyncio.run(run(rows))
+
+
+if __name__ == "__main__":
+    main()
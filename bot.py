@@ -1,15 +1,16 @@
-import os
-import shutil
 import asyncio
 import logging
 import discord
 from discord.ext import commands
 from datetime import datetime, timedelta
 
-from config import TOKEN, STAFF_ROLE_NAME, BACKUP_DIR, DB_NAME, STORE_NAME
-from database import SimpleDB, ProductsCache
-from utils import load_products_json, get_log_channel, cleanup_old_backups
+from config import TOKEN, STAFF_ROLE_NAME, STORE_NAME
+from database import SimpleDB, ProductsCache, ActiveTicketStore
+from utils import load_products_json, get_log_channel, cleanup_old_backups, RecentKeys
 from cogs.react import AutoReact
+from router import ComponentRouter
+from scheduler import Scheduler
+from backup import create_incremental_backup
 
 # Terminal colors
 CYAN  = "\033[0;36m"
@@ -55,20 +56,18 @@ class DiscordErrorHandler(logging.Handler):
         self._queue.append(self.format(record))
 
     async def flush_to_discord(self):
-        while True:
-            await asyncio.sleep(5)
-            if not self._queue:
-                continue
-            messages = self._queue.copy()
-            self._queue.clear()
-            for guild in self.bot.guilds:
-                backup_channel = discord.utils.get(guild.channels, name="backup-db")
-                if backup_channel:
-                    for msg in messages:
-                        try:
-                            await backup_channel.send(f"```\n⚠️ ERROR LOG\n{msg[:1900]}\n```")
-                        except Exception:
-                            pass
+        if not self._queue:
+            return
+        messages = self._queue.copy()
+        self._queue.clear()
+        for guild in self.bot.guilds:
+            backup_channel = discord.utils.get(guild.channels, name="backup-db")
+            if backup_channel:
+                for msg in messages:
+                    try:
+                        await backup_channel.send(f"```\n⚠️ ERROR LOG\n{msg[:1900]}\n```")
+                    except Exception:
+                        pass
 
 intents = discord.Intents.default()
 intents.message_content = True
@@ -80,11 +79,13 @@ bot = commands.Bot(command_prefix="!", intents=intents)
 
 bot.db = SimpleDB()
 bot.products_cache = ProductsCache(bot.db)
-bot.active_tickets = {}
+bot.active_tickets = ActiveTicketStore(bot.db)
 bot.blacklist = set()
-bot.PRODUCTS = []
 bot.auto_react = AutoReact()
 bot.auto_react_all = {}
+bot.interaction_dedup = RecentKeys(maxsize=1000, ttl=900)  # dipakai router & persistent view
+bot.router = ComponentRouter(bot.interaction_dedup)
+bot.scheduler = Scheduler(bot.db)
 
 # Error handler untuk kirim log ke Discord
 bot._error_handler = DiscordErrorHandler(bot)
@@ -92,171 +93,101 @@ logging.getLogger().addHandler(bot._error_handler)
 
 # ─── Background Tasks ─────────────────────────────────────────────────────────
 
-async def rotating_status():
-    await bot.wait_until_ready()
-    while True:
-        try:
-            all_trans = await bot.db.get_all_transactions()
-            total_trx = len(all_trans)
-            total_products = len(bot.PRODUCTS)
-            total_members = sum(
-                sum(1 for m in g.members if not m.bot)
-                for g in bot.guilds
-            )
-
-            statuses = [
-                (discord.ActivityType.playing, f"{STORE_NAME}"),
-                (discord.ActivityType.watching, f"{total_members} members"),
-                (discord.ActivityType.playing, f"{total_products} produk tersedia"),
-                (discord.ActivityType.watching, f"{total_trx} transaksi selesai"),
-                (discord.ActivityType.listening, "QRIS • DANA • BCA"),
-            ]
-
-            for activity_type, text in statuses:
-                await bot.change_presence(
-                    status=discord.Status.online,
-                    activity=discord.Activity(type=activity_type, name=text)
-                )
-                await asyncio.sleep(300)
-        except Exception as e:
-            logger.error(f"Rotating status error: {e}")
-            await asyncio.sleep(300)
+# Semua dijalankan oleh bot.scheduler (lihat _register_jobs); tiap fungsi = satu kali jalan
 
+_status_index = 0
 
-async def auto_backup():
-    while True:
-        try:
-            os.makedirs(BACKUP_DIR, exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_name = f"{BACKUP_DIR}/store_backup_{timestamp}.db"
-            shutil.copy2(DB_NAME, backup_name)
-            logger.info(f"✓ Auto backup berhasil: {backup_name}")
-            for guild in bot.guilds:
-                try:
-                    backup_channel = discord.utils.get(guild.channels, name="backup-db")
-                    if not backup_channel:
-                        staff_role = discord.utils.get(guild.roles, name=STAFF_ROLE_NAME)
-                        overwrites = {
-                            guild.default_role: discord.PermissionOverwrite(read_messages=False),
-                            guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True),
-                        }
-                        if staff_role:
-                            overwrites[staff_role] = discord.PermissionOverwrite(read_messages=True)
-                        backup_channel = await guild.create_text_channel(
-                            name="backup-db",
-                            overwrites=overwrites,
-                            topic=f"🔒 Backup otomatis database {STORE_NAME}",
-                        )
-                    await backup_channel.send(
-                        content=f"🗄️ **AUTO BACKUP**\n📅 {datetime.now().strftime('%d/%m/%Y %H:%M')}\n📦 `{backup_name}`",
-                        file=discord.File(backup_name),
-                    )
-                except Exception as e:
-                    logger.error(f"❌ Gagal kirim backup ke Discord: {e}")
-            cleanup_old_backups()
-        except Exception as e:
-            logger.error(f"❌ Gagal auto backup: {e}")
-
-        await asyncio.sleep(21600)
 
+async def rotating_status():
+    global _status_index
+    total_trx = (await bot.db.rollup_sales())["count"]
+    total_products = len(bot.products_cache.catalog)
+    total_members = sum(
+        sum(1 for m in g.members if not m.bot)
+        for g in bot.guilds
+    )
+
+    statuses = [
+        (discord.ActivityType.playing, f"{STORE_NAME}"),
+        (discord.ActivityType.watching, f"{total_members} members"),
+        (discord.ActivityType.playing, f"{total_products} produk tersedia"),
+        (discord.ActivityType.watching, f"{total_trx} transaksi selesai"),
+        (discord.ActivityType.listening, "QRIS • DANA • BCA"),
+    ]
+
+    activity_type, text = statuses[_status_index % len(statuses)]
+    _status_index += 1
+    await bot.change_presence(
+        status=discord.Status.online,
+        activity=discord.Activity(type=activity_type, name=text)
+    )
 
-async def auto_daily_summary():
-    while True:
-        now = datetime.now()
-        next_midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-        seconds_until_midnight = (next_midnight - now).total_seconds()
-        await asyncio.sleep(seconds_until_midnight)
 
-        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+async def auto_backup():
+    # Rantai incremental: yang dikirim ke Discord hanya halaman yang berubah sejak backup sebelumnya
+    result = await create_incremental_backup()
+    backup_name = result["path"]
+    logger.info(
+        f"✓ Auto backup {result['type']} berhasil: {backup_name} "
+        f"({result['pages']}/{result['page_count']} halaman, {result['size'] / 1024:.1f} KB, {result['duration_ms']:.0f} ms)"
+    )
+    for guild in bot.guilds:
         try:
-            all_trans = await bot.db.get_all_transactions()
-            daily = [
-                t for t in all_trans
-                if t["timestamp"].strftime("%Y-%m-%d") == yesterday
-            ]
-            total_omset = sum(t["total_price"] for t in daily)
-            total_trx = len(daily)
-
-            methods = {}
-            for t in daily:
-                m = t.get("payment_method") or "-"
-                methods[m] = methods.get(m, 0) + 1
-
-            method_str = "\n".join(f"{m}: {c} transaksi" for m, c in methods.items()) or "-"
-
-            embed = discord.Embed(
-                title=f"REKAP HARIAN — {yesterday}",
-                color=0x00FF00,
-                timestamp=datetime.now(),
+            backup_channel = discord.utils.get(guild.channels, name="backup-db")
+            if not backup_channel:
+                staff_role = discord.utils.get(guild.roles, name=STAFF_ROLE_NAME)
+                overwrites = {
+                    guild.default_role: discord.PermissionOverwrite(read_messages=False),
+                    guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+                }
+                if staff_role:
+                    overwrites[staff_role] = discord.PermissionOverwrite(read_messages=True)
+                backup_channel = await guild.create_text_channel(
+                    name="backup-db",
+                    overwrites=overwrites,
+                    topic=f"🔒 Backup otomatis database {STORE_NAME}",
+                )
+            await backup_channel.send(
+                content=(
+                    f"🗄️ **AUTO BACKUP** ({result['type']})\n📅 {datetime.now().strftime('%d/%m/%Y %H:%M')}\n📦 `{backup_name}`\n"
+                    f"📄 {result['pages']}/{result['page_count']} halaman • {result['size'] / 1024:.1f} KB"
+                    + (f" • parent `{result['parent']}`" if result["parent"] else "") + "\n"
+                    f"🔒 sha256 `{result['file_sha256'][:16]}…` • integrity `{result['integrity']}`"
+                ),
+                file=discord.File(backup_name),
             )
-            embed.add_field(name="Total Transaksi", value=str(total_trx), inline=True)
-            embed.add_field(name="Total Omset", value=f"Rp {total_omset:,}", inline=True)
-            embed.add_field(name="Metode Bayar", value=method_str, inline=False)
-            if total_trx == 0:
-                embed.description = "Tidak ada transaksi hari ini."
-            embed.set_footer(text=f"{STORE_NAME} • Auto Summary")
-
-            for guild in bot.guilds:
-                backup_channel = discord.utils.get(guild.channels, name="backup-db")
-                if backup_channel:
-                    await backup_channel.send(embed=embed)
-            logger.info(f"✓ Auto summary terkirim untuk {yesterday}")
         except Exception as e:
-            logger.error(f"❌ Gagal auto summary: {e}")
+            logger.error(f"❌ Gagal kirim backup ke Discord: {e}")
+    cleanup_old_backups()
 
 
-async def ticket_reminder():
-    await bot.wait_until_ready()
-    while True:
-        await asyncio.sleep(3600)
-        try:
-            now = datetime.now()
-            for channel_id, ticket in list(bot.active_tickets.items()):
-                if ticket.get("status") != "OPEN":
-                    continue
-                created_at = ticket.get("created_at")
-                if not created_at:
-                    continue
-                if isinstance(created_at, str):
-                    created_at = datetime.fromisoformat(created_at)
-                delta = (now - created_at).total_seconds() / 3600
-                if delta >= 1:
-                    for guild in bot.guilds:
-                        channel = guild.get_channel(int(channel_id))
-                        if not channel:
-                            continue
-                        user = guild.get_member(int(ticket["user_id"]))
-                        staff_role = discord.utils.get(guild.roles, name=STAFF_ROLE_NAME)
-                        embed = discord.Embed(
-                            title="PENGINGAT TIKET",
-                            description=(
-                                f"Tiket ini tidak ada aktivitas selama **{int(delta)} jam**.\n\n"
-                                f"Jika transaksi sudah selesai, Admin Store harap segera ketik `!done`.\n"
-                                f"Jika transaksi dibatalkan, ketik `!cancel`.\n\n"
-                                f"⚠️ Perhatian: Jika bot mengalami update atau restart, tiket yang "
-                                f"menggantung terlalu lama berisiko tidak dapat dilanjutkan.\n"
-                                f"Segera selesaikan tiket ini!"
-                            ),
-                            color=0xFFA500
-                        )
-                        embed.set_footer(text=STORE_NAME)
-                        mentions = user.mention if user else ""
-                        if staff_role:
-                            mentions += f" {staff_role.mention}"
-
-                        # Hapus reminder lama sebelum kirim baru
-                        old_reminder_id = ticket.get("reminder_message_id")
-                        if old_reminder_id:
-                            try:
-                                old_msg = await channel.fetch_message(int(old_reminder_id))
-                                await old_msg.delete()
-                            except Exception:
-                                pass
-
-                        new_reminder = await channel.send(content=mentions, embed=embed)
-                        ticket["reminder_message_id"] = new_reminder.id
-        except Exception as e:
-            logger.error(f"Gagal kirim reminder tiket: {e}")
+async def auto_daily_summary():
+    today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    yesterday_start = today_start - timedelta(days=1)
+    yesterday = yesterday_start.strftime("%Y-%m-%d")
+    by_method = await bot.db.rollup_sales(yesterday_start, today_start, group_by="payment_method")
+    total_omset = sum(m["revenue"] for m in by_method)
+    total_trx = sum(m["count"] for m in by_method)
+
+    method_str = "\n".join(f"{m['key']}: {m['count']} transaksi" for m in by_method) or "-"
+
+    embed = discord.Embed(
+        title=f"REKAP HARIAN — {yesterday}",
+        color=0x00FF00,
+        timestamp=datetime.now(),
+    )
+    embed.add_field(name="Total Transaksi", value=str(total_trx), inline=True)
+    embed.add_field(name="Total Omset", value=f"Rp {total_omset:,}", inline=True)
+    embed.add_field(name="Metode Bayar", value=method_str, inline=False)
+    if total_trx == 0:
+        embed.description = "Tidak ada transaksi hari ini."
+    embed.set_footer(text=f"{STORE_NAME} • Auto Summary")
+
+    for guild in bot.guilds:
+        backup_channel = discord.utils.get(guild.channels, name="backup-db")
+        if backup_channel:
+            await backup_channel.send(embed=embed)
+    logger.info(f"✓ Auto summary terkirim untuk {yesterday}")
 
 
 async def update_member_count(guild):
@@ -284,13 +215,56 @@ async def update_member_count(guild):
 
 
 async def update_all_member_counts():
-    while True:
-        for guild in bot.guilds:
-            await update_member_count(guild)
-        await asyncio.sleep(600)
+    for guild in bot.guilds:
+        await update_member_count(guild)
+
+
+def _register_jobs():
+    s = bot.scheduler
+    s.every("auto_backup", 21600, auto_backup, jitter=60)
+    s.daily("auto_daily_summary", 0, 0, auto_daily_summary, jitter=30)
+    s.every("member_count", 600, update_all_member_counts, jitter=30, catch_up=False, persist=False)
+    s.every("error_log_flush", 5, bot._error_handler.flush_to_discord, catch_up=False, persist=False)
+    s.every("rotating_status", 300, rotating_status, catch_up=False, persist=False)
 
 # ─── Events ───────────────────────────────────────────────────────────────────
 
+async def reload_state():
+    """Muat ulang semua state di memori dari database: saat startup dan setelah restore / migrasi.
+    Cog yang punya state sendiri (giveaway) ikut lewat event state_reloaded"""
+    await bot.products_cache.refresh()
+
+    try:
+        loaded = await bot.active_tickets.load()
+        logger.info(f"✓ Loaded {loaded} active tickets")
+        bot.dispatch("tickets_loaded")
+    except Exception as e:
+        logger.error(f"Error loading tickets: {e}")
+
+    try:
+        bot.blacklist = {row["user_id"] for row in await bot.db.get_blacklist()}
+        logger.info(f"✓ Loaded {len(bot.blacklist)} blacklist entries")
+    except Exception as e:
+        logger.error(f"Error loading blacklist: {e}")
+
+    try:
+        bot.auto_react_all = await bot.db.load_auto_react_all()
+        logger.info(f"✓ Loaded {len(bot.auto_react_all)} auto_react_all entries")
+    except Exception as e:
+        logger.error(f"Error loading auto_react_all: {e}")
+
+    try:
+        bot.auto_react.enabled_channels = await bot.db.load_auto_react()
+        logger.info(f"✓ Loaded {len(bot.auto_react.enabled_channels)} auto_react entries")
+    except Exception as e:
+        logger.error(f"Error loading auto_react: {e}")
+
+    bot.dispatch("state_reloaded")
+
+
+bot.reload_state = reload_state
+
+
 @bot.event
 async def on_ready():
     if hasattr(bot, "_ready_called"):
@@ -324,37 +298,17 @@ async def on_ready():
 
     await bot.db.init_db()
 
-    db_products = await bot.db.load_products()
-    if not db_products:
-        bot.PRODUCTS = load_products_json()
-        await bot.db.save_products(bot.PRODUCTS)
+    catalog = await bot.products_cache.refresh()
+    if not catalog:
+        await bot.db.save_products(load_products_json())
+        catalog = await bot.products_cache.refresh()
         print(f"{GREEN}  ✓ Database: produk diimport dari products.json{NC}")
     else:
-        bot.PRODUCTS = db_products
-        print(f"{GREEN}  ✓ Database: {len(bot.PRODUCTS)} produk dimuat{NC}")
-
-    await bot.products_cache.load_from_db()
+        print(f"{GREEN}  ✓ Database: {len(catalog)} produk dimuat{NC}")
 
     await asyncio.sleep(2)
 
-    try:
-        bot.active_tickets = await bot.db.get_active_tickets()
-        logger.info(f"✓ Loaded {len(bot.active_tickets)} active tickets")
-    except Exception as e:
-        logger.error(f"Error loading tickets: {e}")
-        bot.active_tickets = {}
-
-    try:
-        bot.auto_react_all = await bot.db.load_auto_react_all()
-        logger.info(f"✓ Loaded {len(bot.auto_react_all)} auto_react_all entries")
-    except Exception as e:
-        logger.error(f"Error loading auto_react_all: {e}")
-
-    try:
-        bot.auto_react.enabled_channels = await bot.db.load_auto_react()
-        logger.info(f"✓ Loaded {len(bot.auto_react.enabled_channels)} auto_react entries")
-    except Exception as e:
-        logger.error(f"Error loading auto_react: {e}")
+    await reload_state()
 
     try:
         synced = await bot.tree.sync()
@@ -362,15 +316,17 @@ async def on_ready():
     except Exception as e:
         logger.error(f"Sync error: {e}")
 
-    bot.loop.create_task(auto_backup())
-    bot.loop.create_task(auto_daily_summary())
-    bot.loop.create_task(update_all_member_counts())
-    bot.loop.create_task(bot._error_handler.flush_to_discord())
-    bot.loop.create_task(rotating_status())
-    bot.loop.create_task(ticket_reminder())
+    _register_jobs()
+    await bot.scheduler.start()
     logger.info("✓ Background tasks started")
 
 
+@bot.event
+async def on_interaction(interaction):
+    # Semua klik komponen lewat satu router (lihat router.py)
+    await bot.router.dispatch(interaction)
+
+
 @bot.event
 async def on_member_join(member):
     await update_member_count(member.guild)
@@ -399,7 +355,13 @@ async def main():
         await bot.load_extension("cogs.welcome")
         await bot.load_extension("cogs.info")
         logger.info("✓ All cogs loaded")
-        await bot.start(TOKEN)
+        try:
+            await bot.start(TOKEN)
+        finally:
+            await bot.scheduler.stop()
+            # Simpan keranjang tiket yang masih tertunda (write-behind) sebelum DB ditutup
+            await bot.active_tickets.flush()
+            await bot.db.close()
 
 
 if __name__ == "__main__":
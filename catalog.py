@@ -0,0 +1,64 @@
+from config import CATEGORY_PRIORITY
+
+# Jumlah item per halaman browser kategori (= batas opsi select menu Discord)
+CATEGORY_PAGE_SIZE = 25
+
+
+def _sort_key(product):
+    return (-(product.get("spotlight") or 0), product["id"])
+
+
+class Catalog:
+    """Snapshot produk yang sudah di-index: by_id, per kategori, spotlight, urutan kategori.
+
+    Tidak diubah setelah dibuat. Perubahan produk membuat Catalog baru lewat
+    with_product / without_product lalu diganti sekaligus di ProductsCache,
+    jadi pembaca tidak pernah melihat index yang setengah jadi. Dict produk di
+    dalamnya jangan di-mutate langsung — buat salinan lalu with_product.
+    """
+
+    def __init__(self, products=()):
+        self.products = tuple(sorted(products, key=_sort_key))
+        self.by_id = {p["id"]: p for p in self.products}
+        buckets = {}
+        for p in self.products:
+            buckets.setdefault(p["category"], []).append(p)
+        self.by_category = {cat: tuple(items) for cat, items in buckets.items()}
+        self.spotlight = tuple(p for p in self.products if p.get("spotlight"))
+        order = [c for c in CATEGORY_PRIORITY if c in buckets]
+        order += [c for c in buckets if c not in order]
+        self.category_order = tuple(order)
+        self.category_pages = {
+            cat: tuple(items[i:i + CATEGORY_PAGE_SIZE] for i in range(0, len(items), CATEGORY_PAGE_SIZE))
+            for cat, items in self.by_category.items()
+        }
+
+    def __len__(self):
+        return len(self.products)
+
+    def __iter__(self):
+        return iter(self.products)
+
+    def __contains__(self, item_id):
+        return item_id in self.by_id
+
+    def get(self, item_id, default=None):
+        return self.by_id.get(item_id, default)
+
+    def in_category(self, category):
+        return self.by_category.get(category, ())
+
+    def category_page(self, category, page):
+        """(items, page, jumlah_halaman) untuk halaman ke-page, dijepit ke rentang yang valid"""
+        pages = self.category_pages.get(category, ())
+        if not pages:
+            return (), 0, 0
+        page = max(0, min(page, len(pages) - 1))
+        return pages[page], page, len(pages)
+
+    def with_product(self, product):
+        """Catalog baru dengan produk ini ditambah / diganti (berdasarkan id)"""
+        return Catalog([p for p in self.products if p["id"] != product["id"]] + [product])
+
+    def without_product(self, item_id):
+        return Catalog(p for p in self.products if p["id"] != item_id)
@@ -2,7 +2,6 @@ import os
 import sys
 import csv
 import io
-import json
 import time
 import shutil
 import asyncio
@@ -20,11 +19,23 @@ from utils import (
     load_broadcast_cooldown,
     save_broadcast_cooldown,
     is_staff,
+    save_products_json,
+    UserNameResolver,
 )
+from backup import create_backup, snapshot_db, restore_database, reset_database, load_chain
 
 logger = logging.getLogger(__name__)
 
 
+def _write_migration_zip(zip_path, db_snapshot, products):
+    # products.json tidak diperbarui per edit produk, jadi ditulis ulang dari catalog saat export
+    save_products_json(products)
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        if db_snapshot:
+            zf.write(db_snapshot, "store.db")
+        zf.write("products.json", "products.json")
+
+
 # ─── Modals ──────────────────────────────────────────────────────────────────
 
 class ResetDBModal(discord.ui.Modal, title="Konfirmasi Reset Database"):
@@ -43,14 +54,14 @@ class ResetDBModal(discord.ui.Modal, title="Konfirmasi Reset Database"):
             return
 
         await interaction.response.defer(ephemeral=True)
-        os.makedirs(BACKUP_DIR, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = f"{BACKUP_DIR}/pre_reset_backup_{timestamp}.db"
-        shutil.copy2(DB_NAME, backup_name)
-        os.remove(DB_NAME)
-        await interaction.client.db.init_db()
+        bot = interaction.client
+        # Ditukar ke file kosong lewat pool.swap (seperti /restore), bukan close + hapus file:
+        # job / interaction yang jalan bersamaan menunggu lalu lanjut di database baru
+        await bot.active_tickets.flush()
+        result = await reset_database(bot.db)
+        await bot.reload_state()
         await interaction.followup.send(
-            f"✅ Database telah direset!\n📁 Backup: `{backup_name}`", ephemeral=True
+            f"✅ Database telah direset!\n📁 Backup: `{result['pre_restore']}`", ephemeral=True
         )
 
 
@@ -112,20 +123,18 @@ class AdminCog(commands.Cog):
         if not is_staff(interaction):
             await interaction.response.send_message("❌ Admin only!", ephemeral=True)
             return
+        await interaction.response.defer()
         try:
-            os.makedirs(BACKUP_DIR, exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_name = f"{BACKUP_DIR}/manual_backup_{timestamp}.db"
-            shutil.copy2(DB_NAME, backup_name)
-            size = os.path.getsize(backup_name) / 1024
-            await interaction.response.send_message(
+            result = await create_backup("manual_backup")
+            await interaction.followup.send(
                 f"✅ **Backup berhasil!**\n"
-                f"📁 File: `{backup_name}`\n"
-                f"📊 Ukuran: `{size:.2f} KB`\n"
+                f"📁 File: `{result['path']}`\n"
+                f"📊 Ukuran: `{result['size'] / 1024:.2f} KB` (asli `{result['raw_size'] / 1024:.2f} KB`)\n"
+                f"🔒 sha256: `{result['sha256'][:16]}…` • integrity: `{result['integrity']}`\n"
                 f"🕒 Waktu: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
             )
         except Exception as e:
-            await interaction.response.send_message(f"❌ Gagal backup: {str(e)[:100]}")
+            await interaction.followup.send(f"❌ Gagal backup: {str(e)[:100]}")
 
     @app_commands.command(name="listbackup", description="[ADMIN] Lihat daftar backup")
     async def list_backups(self, interaction: discord.Interaction):
@@ -135,14 +144,29 @@ class AdminCog(commands.Cog):
         if not os.path.exists(BACKUP_DIR):
             await interaction.response.send_message("📁 Folder backups belum ada.")
             return
-        backups = sorted(os.listdir(BACKUP_DIR), reverse=True)[:10]
-        if not backups:
+        backups = sorted(
+            (f for f in os.listdir(BACKUP_DIR) if not f.endswith(".sha256") and os.path.isfile(f"{BACKUP_DIR}/{f}")),
+            reverse=True,
+        )[:10]
+        links = load_chain()["links"]
+        if not backups and not links:
             await interaction.response.send_message("📝 Belum ada backup.")
             return
         embed = discord.Embed(title="📁 DAFTAR BACKUP", color=0x00BFFF)
         for b in backups:
             size = os.path.getsize(f"{BACKUP_DIR}/{b}") / 1024
             embed.add_field(name=b, value=f"{size:.2f} KB", inline=False)
+        if links:
+            fulls = sum(1 for link in links if link["type"] == "full")
+            embed.add_field(
+                name="🔗 Auto backup (incremental)",
+                value=(
+                    f"{len(links)} link ({fulls} full) • {sum(link['size'] for link in links) / 1024:.1f} KB\n"
+                    f"Terakhir: `{links[-1]['id']}` ({links[-1]['type']})\n"
+                    f"Restore titik waktu: `python3 backup.py restore <id|latest> <file.db>`"
+                ),
+                inline=False,
+            )
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="restore", description="[ADMIN] Restore database dari backup")
@@ -160,28 +184,83 @@ class AdminCog(commands.Cog):
             return
         await interaction.response.defer(ephemeral=True)
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            pre_restore = f"{BACKUP_DIR}/pre_restore_{timestamp}.db"
-            shutil.copy2(DB_NAME, pre_restore)
-            shutil.copy2(backup_path, DB_NAME)
-            size = os.path.getsize(DB_NAME) / (1024 * 1024)
-            embed = discord.Embed(
-                title="✅ RESTORE BERHASIL",
-                description=f"Database berhasil direstore dari `{backup_file}`",
-                color=0x00BFFF,
-            )
-            embed.add_field(name="📊 Ukuran", value=f"{size:.2f} MB", inline=True)
-            embed.add_field(name="💾 Backup sebelum restore", value=f"`pre_restore_{timestamp}.db`", inline=True)
-            await interaction.followup.send(embed=embed)
-            log_channel = await get_log_channel(interaction.guild)
-            if log_channel:
-                await log_channel.send(
-                    f"🔄 **Database direstore** oleh {interaction.user.mention}\n"
-                    f"Dari: `{backup_file}`"
-                )
-            await interaction.followup.send("⚠️ **Disarankan restart bot** agar perubahan diterapkan.")
+            # Keranjang tiket yang belum tersimpan ikut masuk backup pre_restore
+            await self.bot.active_tickets.flush()
+            result = await restore_database(self.bot.db, backup_path)
+        except ValueError as e:
+            await interaction.followup.send(f"❌ Backup `{backup_file}` rusak: {e}", ephemeral=True)
+            return
         except Exception as e:
             await interaction.followup.send(f"❌ Gagal restore: {str(e)[:100]}")
+            return
+        await self.bot.reload_state()
+        embed = discord.Embed(
+            title="✅ RESTORE BERHASIL",
+            description=f"Database berhasil direstore dari `{backup_file}` tanpa restart",
+            color=0x00BFFF,
+        )
+        embed.add_field(name="📊 Ukuran", value=f"{result['size'] / (1024 * 1024):.2f} MB", inline=True)
+        embed.add_field(name="💾 Backup sebelum restore", value=f"`{os.path.basename(result['pre_restore'])}`", inline=True)
+        embed.add_field(name="⏱️ Jeda database", value=f"{result['downtime_ms']:.0f} ms", inline=True)
+        await interaction.followup.send(embed=embed)
+        log_channel = await get_log_channel(interaction.guild)
+        if log_channel:
+            await log_channel.send(
+                f"🔄 **Database direstore** oleh {interaction.user.mention}\n"
+                f"Dari: `{backup_file}`"
+            )
+
+    @app_commands.command(name="perfstats", description="[ADMIN] Statistik cache & performa bot")
+    async def perf_stats(self, interaction: discord.Interaction):
+        if not is_staff(interaction):
+            await interaction.response.send_message("❌ Admin only!", ephemeral=True)
+            return
+        cache = self.bot.products_cache.get_stats()
+        last_update = self.bot.products_cache.last_update
+        embed = discord.Embed(title="⚙️ PERFORMA BOT", color=0x00BFFF, timestamp=datetime.now())
+        embed.add_field(
+            name="📦 Products Cache",
+            value=(
+                f"Hit: **{cache['hits']}** • Miss: **{cache['misses']}** ({cache['hit_rate']:.1%})\n"
+                f"Refresh: **{cache['refreshes']}** • Terakhir: {cache['last_refresh_ms']:.1f} ms\n"
+                f"Versi: `{cache['version']}` • Produk: {cache['products']}\n"
+                f"Dimuat: {last_update.strftime('%d/%m %H:%M:%S') if last_update else '-'}"
+            ),
+            inline=False,
+        )
+        routes = sorted(self.bot.router.get_stats().items(), key=lambda kv: kv[1]["calls"], reverse=True)
+        lines = [
+            f"`{key}` {s['calls']}x • avg {s['avg_ms']:.1f} ms • max {s['max_ms']:.1f} ms"
+            + (f" • ❌ {s['errors']}" if s["errors"] else "")
+            for key, s in routes
+        ]
+        embed.add_field(name="🖱️ Komponen", value="\n".join(lines)[:1024] or "-", inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="jobs", description="[ADMIN] Status background job (scheduler)")
+    async def jobs(self, interaction: discord.Interaction):
+        if not is_staff(interaction):
+            await interaction.response.send_message("❌ Admin only!", ephemeral=True)
+            return
+        embed = discord.Embed(title="⏱️ BACKGROUND JOBS", color=0x00BFFF, timestamp=datetime.now())
+        for job in self.bot.scheduler.get_jobs()[:25]:
+            if job.running:
+                next_run = "▶️ sedang jalan"
+            elif job.next_run:
+                next_run = f"<t:{int(job.next_run)}:R>"
+            else:
+                next_run = "-"
+            last = f"<t:{int(job.last_run)}:R> ({job.last_duration_ms:.0f} ms)" if job.last_run and job.last_duration_ms is not None else "-"
+            value = (
+                f"{job.describe()} • berikutnya: {next_run}\n"
+                f"Terakhir: {last} • Run: {job.runs} • Gagal: {job.failures}"
+            )
+            if job.last_error:
+                value += f"\n❌ `{job.last_error[:150]}`"
+            embed.add_field(name=job.name, value=value, inline=False)
+        if not embed.fields:
+            embed.description = "Belum ada job terdaftar."
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
     # ─── Stats ───────────────────────────────────────────────────
 
@@ -190,28 +269,17 @@ class AdminCog(commands.Cog):
         if not is_staff(interaction):
             await interaction.response.send_message("Admin only!", ephemeral=True)
             return
-        all_transactions = await self.bot.db.get_all_transactions()
-        today = datetime.now().date()
-        week_ago = today - timedelta(days=7)
-        month_ago = today - timedelta(days=30)
-        today_trans, week_trans, month_trans = [], [], []
-        for t in all_transactions:
-            try:
-                ts = t["timestamp"] if isinstance(t["timestamp"], datetime) else datetime.fromisoformat(t["timestamp"])
-                t_date = ts.date()
-                if t_date == today:
-                    today_trans.append(t)
-                if t_date >= week_ago:
-                    week_trans.append(t)
-                if t_date >= month_ago:
-                    month_trans.append(t)
-            except Exception:
-                continue
+        db = self.bot.db
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        today_stats = await db.rollup_sales(start=today)
+        week_stats = await db.rollup_sales(start=today - timedelta(days=7))
+        month_stats = await db.rollup_sales(start=today - timedelta(days=30))
+        all_stats = await db.rollup_sales()
         embed = discord.Embed(title="STATISTIK PENJUALAN", color=0x00BFFF, timestamp=datetime.now())
-        embed.add_field(name="HARI INI", value=f"{len(today_trans)} transaksi\nRp {sum(t['total_price'] for t in today_trans):,}", inline=True)
-        embed.add_field(name="7 HARI", value=f"{len(week_trans)} transaksi\nRp {sum(t['total_price'] for t in week_trans):,}", inline=True)
-        embed.add_field(name="30 HARI", value=f"{len(month_trans)} transaksi\nRp {sum(t['total_price'] for t in month_trans):,}", inline=True)
-        embed.add_field(name="TOTAL", value=f"{len(all_transactions)} transaksi\nRp {sum(t['total_price'] for t in all_transactions):,}", inline=False)
+        embed.add_field(name="HARI INI", value=f"{today_stats['count']} transaksi\nRp {today_stats['revenue']:,}", inline=True)
+        embed.add_field(name="7 HARI", value=f"{week_stats['count']} transaksi\nRp {week_stats['revenue']:,}", inline=True)
+        embed.add_field(name="30 HARI", value=f"{month_stats['count']} transaksi\nRp {month_stats['revenue']:,}", inline=True)
+        embed.add_field(name="TOTAL", value=f"{all_stats['count']} transaksi\nRp {all_stats['revenue']:,}", inline=False)
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="statdetail", description="[ADMIN] Statistik detail penjualan")
@@ -219,32 +287,68 @@ class AdminCog(commands.Cog):
         if not is_staff(interaction):
             await interaction.response.send_message("❌ Admin only!", ephemeral=True)
             return
-        all_trans = await self.bot.db.get_all_transactions()
-        real_trans = [t for t in all_trans if not t.get("fake")]
-        if not real_trans:
+        total = await self.bot.db.rollup_sales()
+        if not total["count"]:
             await interaction.response.send_message("📝 Belum ada transaksi real.")
             return
-        total_real = len(real_trans)
-        total_fake = len(all_trans) - total_real
-        total_omset = sum(t["total_price"] for t in real_trans)
+        total_real = total["count"]
+        total_omset = total["revenue"]
         avg_transaksi = total_omset / total_real if total_real else 0
-        metode = {}
-        for t in real_trans:
-            m = t.get("payment_method", "Unknown")
-            metode[m] = metode.get(m, 0) + 1
-        metode_str = "\n".join(f"  {m}: {c}x" for m, c in metode.items())
-        first_date = min(datetime.fromisoformat(str(t["timestamp"])) if isinstance(t["timestamp"], str) else t["timestamp"] for t in real_trans)
-        days_active = max(1, (datetime.now() - first_date).days)
+        by_method = await self.bot.db.rollup_sales(group_by="payment_method")
+        metode_str = "\n".join(f"  {m['key']}: {m['count']}x" for m in by_method)
+        days_active = max(1, (datetime.now() - total["first"]).days) if total["first"] else 1
         avg_daily = total_omset / days_active
         embed = discord.Embed(title="📊 STATISTIK DETAIL", color=0x00BFFF, timestamp=datetime.now())
         embed.add_field(name="💰 Total Omset", value=f"Rp {total_omset:,}", inline=True)
-        embed.add_field(name="📦 Total Transaksi", value=f"{total_real} real / {total_fake} fake", inline=True)
+        embed.add_field(name="📦 Total Transaksi", value=f"{total_real} transaksi", inline=True)
         embed.add_field(name="📈 Rata-rata", value=f"Rp {avg_transaksi:,.0f}/transaksi", inline=True)
         embed.add_field(name="📅 Rata-rata/hari", value=f"Rp {avg_daily:,.0f}", inline=True)
         embed.add_field(name="💳 Metode", value=metode_str or "-", inline=True)
-        embed.add_field(name="👥 Total User", value=len(set(t["user_id"] for t in real_trans)), inline=True)
+        embed.add_field(name="👥 Total User", value=str(await self.bot.db.count_buyers()), inline=True)
         await interaction.response.send_message(embed=embed)
 
+    @app_commands.command(name="topproducts", description="[ADMIN] Produk terlaris berdasarkan omset atau jumlah")
+    @app_commands.describe(days="N hari terakhir (kosongkan untuk semua)", limit="Jumlah produk (maks 25)", by="Urutkan berdasarkan")
+    @app_commands.choices(by=[
+        app_commands.Choice(name="Omset", value="revenue"),
+        app_commands.Choice(name="Jumlah terjual", value="qty"),
+    ])
+    async def top_products(self, interaction: discord.Interaction, days: int = 0, limit: int = 10, by: str = "revenue"):
+        if not is_staff(interaction):
+            await interaction.response.send_message("❌ Admin only!", ephemeral=True)
+            return
+        limit = max(1, min(limit, 25))
+        start = datetime.now() - timedelta(days=days) if days and days > 0 else None
+        rows = await self.bot.db.top_products(start=start, by=by, limit=limit)
+        period = f"{days} hari terakhir" if start else "semua waktu"
+        if not rows:
+            await interaction.response.send_message(f"📝 Belum ada penjualan ({period}).", ephemeral=True)
+            return
+        lines = [
+            f"**{i}.** {r['name']} — {r['qty']}x • Rp {r['revenue']:,}"
+            for i, r in enumerate(rows, 1)
+        ]
+        embed = discord.Embed(
+            title=f"🏆 TOP PRODUK ({period})",
+            description="\n".join(lines),
+            color=0x00BFFF,
+            timestamp=datetime.now(),
+        )
+        embed.set_footer(text="Urut: " + ("jumlah terjual" if by == "qty" else "omset"))
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="rebuildstats", description="[ADMIN] Bangun ulang rekap harian dari histori transaksi")
+    async def rebuild_stats(self, interaction: discord.Interaction):
+        if not is_staff(interaction):
+            await interaction.response.send_message("❌ Admin only!", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+        rows = await self.bot.db.rebuild_daily_sales()
+        if rows is None:
+            await interaction.followup.send("❌ Gagal membangun ulang rekap harian.", ephemeral=True)
+            return
+        await interaction.followup.send(f"✅ Rekap harian dibangun ulang: **{rows}** baris.", ephemeral=True)
+
     # ─── Export ──────────────────────────────────────────────────
 
     @app_commands.command(name="export", description="[ADMIN] Export transaksi ke CSV")
@@ -260,41 +364,57 @@ class AdminCog(commands.Cog):
             return
         await interaction.response.defer(ephemeral=True)
         try:
-            all_trans = await self.bot.db.get_all_transactions()
+            filters = {}
             if filter_user:
-                all_trans = [t for t in all_trans if t["user_id"] == str(filter_user.id)]
+                filters["user_id"] = str(filter_user.id)
             if filter_days:
-                cutoff = datetime.now() - timedelta(days=filter_days)
-                all_trans = [t for t in all_trans if (t["timestamp"] if isinstance(t["timestamp"], datetime) else datetime.fromisoformat(t["timestamp"])) >= cutoff]
-            if not all_trans:
-                await interaction.followup.send("📝 Tidak ada data transaksi.", ephemeral=True)
-                return
-            output = io.StringIO()
+                filters["start"] = datetime.now() - timedelta(days=filter_days)
+            # Ditulis per baris ke file sementara (pindah ke disk di atas 1 MB),
+            # jadi memori tidak ikut membesar dengan jumlah histori
+            spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+b")
+            output = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
             writer = csv.writer(output)
             writer.writerow(["Invoice", "User ID", "Username", "Items", "Total (Rp)", "Metode", "Tanggal", "Fake", "Admin"])
-            for t in all_trans:
-                username = "Unknown"
-                try:
-                    user = await self.bot.fetch_user(int(t["user_id"]))
-                    username = user.name
-                except Exception:
-                    pass
-                items = t["items"] if isinstance(t["items"], list) else json.loads(t["items"])
-                items_str = ", ".join(f"{i['qty']}x {i['name'][:20]}" for i in items)
-                ts = t["timestamp"] if isinstance(t["timestamp"], datetime) else datetime.fromisoformat(t["timestamp"])
-                writer.writerow([
-                    t["invoice"], t["user_id"], username, items_str[:100],
-                    t["total_price"], t.get("payment_method", "-"),
-                    ts.strftime("%Y-%m-%d %H:%M:%S"),
-                    "Ya" if t.get("fake") else "Tidak", t.get("admin_id", "-"),
-                ])
-            output.seek(0)
+            resolver = UserNameResolver(self.bot, interaction.guild)
+            total = 0
+            batch = []
+
+            async def write_batch():
+                # Nama di-resolve per batch: satu lookup per user_id unik, bukan per baris.
+                # Aman menulis (save_user_names) di sini: iter_transactions tidak memegang reader antar batch
+                names = await resolver.resolve_many(t["user_id"] for t in batch)
+                for t in batch:
+                    items_str = ", ".join(f"{i['qty']}x {i['name'][:20]}" for i in t["items"])
+                    writer.writerow([
+                        t["invoice"], t["user_id"], names.get(t["user_id"], "Unknown"), items_str[:100],
+                        t["total_price"], t.get("payment_method", "-"),
+                        t["timestamp"].strftime("%Y-%m-%d %H:%M:%S"),
+                        "Ya" if t.get("fake") else "Tidak", t.get("admin_id", "-"),
+                    ])
+                batch.clear()
+
+            async for t in self.bot.db.iter_transactions(filters):
+                total += 1
+                batch.append(t)
+                if len(batch) >= 500:
+                    await write_batch()
+            await write_batch()
+            output.flush()
+            output.detach()
+            if not total:
+                spool.close()
+                await interaction.followup.send("📝 Tidak ada data transaksi.", ephemeral=True)
+                return
+            spool.seek(0)
             filename = f"transactions_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            await interaction.followup.send(
-                content=f"📊 **Export transaksi**\nTotal: {len(all_trans)} transaksi",
-                file=discord.File(fp=io.BytesIO(output.getvalue().encode("utf-8-sig")), filename=filename),
-                ephemeral=True,
-            )
+            try:
+                await interaction.followup.send(
+                    content=f"📊 **Export transaksi**\nTotal: {total} transaksi",
+                    file=discord.File(fp=spool, filename=filename),
+                    ephemeral=True,
+                )
+            finally:
+                spool.close()
         except Exception as e:
             await interaction.followup.send(f"❌ Gagal export: {str(e)[:100]}", ephemeral=True)
 
@@ -553,11 +673,11 @@ class AdminCog(commands.Cog):
             try:
                 with tempfile.TemporaryDirectory() as tmpdir:
                     zip_path = os.path.join(tmpdir, "migration_package.zip")
-                    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
-                        if os.path.exists(DB_NAME):
-                            zf.write(DB_NAME, "store.db")
-                        if os.path.exists("products.json"):
-                            zf.write("products.json", "products.json")
+                    # Snapshot konsisten (termasuk isi -wal), zip dikerjakan di thread
+                    db_snapshot = await snapshot_db(os.path.join(tmpdir, "store.db")) if os.path.exists(DB_NAME) else None
+                    catalog = await self.bot.products_cache.get_catalog()
+                    products = sorted(catalog, key=lambda x: x["id"])
+                    await asyncio.to_thread(_write_migration_zip, zip_path, db_snapshot, products)
 
                     embed = discord.Embed(
                         title="📦 MIGRATION PACKAGE",
@@ -615,23 +735,20 @@ class AdminCog(commands.Cog):
                             await interaction.followup.send("❌ File zip tidak valid, `store.db` tidak ditemukan!", ephemeral=True)
                             return
 
-                        # Backup DB lama dulu
-                        if os.path.exists(DB_NAME):
-                            shutil.copy2(DB_NAME, DB_NAME + ".pre_migrate")
-
-                        # Extract
-                        if "store.db" in names:
-                            with zf.open("store.db") as src, open(DB_NAME, "wb") as dst:
-                                dst.write(src.read())
+                        zf.extract("store.db", tmpdir)
                         if "products.json" in names:
-                            with zf.open("products.json") as src, open("products.json", "wb") as dst:
-                                dst.write(src.read())
+                            zf.extract("products.json", tmpdir)
+
+                    # Ganti database tanpa restart (DB lama disimpan sebagai backup pre_migrate);
+                    # products.json baru ditimpa setelah store.db lolos verifikasi & terpasang
+                    await self.bot.active_tickets.flush()
+                    await restore_database(self.bot.db, os.path.join(tmpdir, "store.db"), "pre_migrate")
+                    if "products.json" in names:
+                        shutil.copyfile(os.path.join(tmpdir, "products.json"), "products.json")
 
                 # Reload data
-                await self.bot.db.init()
-                products = await self.bot.db.get_all_products()
-                self.bot.PRODUCTS = products
-                self.bot.products_cache.invalidate()
+                await self.bot.reload_state()
+                products = self.bot.products_cache.catalog
 
                 embed = discord.Embed(
                     title="✅ MIGRASI BERHASIL",
@@ -639,7 +756,6 @@ class AdminCog(commands.Cog):
                     color=0x00FF88,
                     timestamp=datetime.now()
                 )
-                embed.add_field(name="⚠️ Catatan", value="Restart bot untuk memastikan semua data termuat dengan sempurna.", inline=False)
                 embed.set_footer(text=f"{STORE_NAME} • Migration Import")
 
                 await interaction.followup.send(embed=embed, ephemeral=True)
@@ -1,4 +1,3 @@
-import asyncio
 import random
 import discord
 from discord import app_commands
@@ -26,39 +25,45 @@ class GiveawayCog(commands.Cog):
         self.active_giveaways = {}  # message_id: {prize, end_time, winners, host_id, participants: set}
 
     async def cog_load(self):
-        """Restore giveaway aktif dari database saat bot start"""
-        self.bot.loop.create_task(self._restore_giveaways())
+        self.bot.router.register("giveaway_join_", self._on_join)
 
-    async def _restore_giveaways(self):
-        await self.bot.wait_until_ready()
+    async def cog_unload(self):
+        self.bot.router.unregister("giveaway_join_")
+
+    @commands.Cog.listener()
+    async def on_state_reloaded(self):
+        """Restore giveaway aktif dari database (saat bot start dan setelah restore database)"""
         try:
             giveaways = await self.bot.db.load_giveaways()
+            # Jadwal giveaway yang tidak ada lagi di database (restore) dibuang
+            for msg_id in self.active_giveaways.keys() - giveaways.keys():
+                self.bot.scheduler.cancel(f"giveaway_{msg_id}")
+            self.active_giveaways = {}
             now = datetime.now()
             restored = 0
             for msg_id, data in giveaways.items():
                 self.active_giveaways[msg_id] = data
-                remaining = (data["end_time"] - now).total_seconds()
-                if remaining > 0:
-                    self.bot.loop.create_task(self._resume_giveaway(msg_id, remaining, data))
+                # Yang sudah lewat waktu langsung diakhiri oleh scheduler
+                self._schedule_end(msg_id)
+                if data["end_time"] > now:
                     restored += 1
-                else:
-                    # Sudah lewat waktu, langsung akhiri
-                    self.bot.loop.create_task(
-                        self._end_giveaway(msg_id, data["channel_id"], data["guild_id"],
-                                           data["prize"], data["winners"], data["host_id"])
-                    )
             if restored:
                 print(f"✓ Restored {restored} active giveaway(s) from database")
         except Exception as e:
             print(f"❌ Error restoring giveaways: {e}")
 
-    async def _resume_giveaway(self, msg_id, remaining_seconds, data):
-        await asyncio.sleep(remaining_seconds)
-        if msg_id in self.active_giveaways:
-            await self._end_giveaway(
-                msg_id, data["channel_id"], data["guild_id"],
-                data["prize"], data["winners"], data["host_id"]
-            )
+    def _schedule_end(self, msg_id):
+        """Daftarkan akhir giveaway ke bot.scheduler (job sekali jalan per giveaway)"""
+        data = self.active_giveaways[msg_id]
+
+        async def end():
+            if msg_id in self.active_giveaways:
+                await self._end_giveaway(
+                    msg_id, data["channel_id"], data["guild_id"],
+                    data["prize"], data["winners"], data["host_id"]
+                )
+
+        self.bot.scheduler.once(f"giveaway_{msg_id}", data["end_time"], end)
 
     def _build_embed(self, prize, end_time, winner_count, host, participants=0, ended=False, winner_mentions=None):
         color = 0x95a5a6 if ended else 0xFF6B6B
@@ -97,6 +102,7 @@ class GiveawayCog(commands.Cog):
         return view
 
     async def _end_giveaway(self, message_id, channel_id, guild_id, prize, winner_count, host_id):
+        self.bot.scheduler.cancel(f"giveaway_{message_id}")
         try:
             guild = self.bot.get_guild(guild_id)
             channel = guild.get_channel(channel_id)
@@ -145,13 +151,8 @@ class GiveawayCog(commands.Cog):
         except Exception as e:
             print(f"❌ Error end giveaway: {e}")
 
-    @commands.Cog.listener()
-    async def on_interaction(self, interaction: discord.Interaction):
-        custom_id = interaction.data.get("custom_id", "")
-        if not custom_id.startswith("giveaway_join_"):
-            return
-
-        message_id = int(custom_id.replace("giveaway_join_", ""))
+    async def _on_join(self, interaction: discord.Interaction, arg):
+        message_id = int(arg)
         user_id = interaction.user.id
 
         if message_id not in self.active_giveaways:
@@ -228,12 +229,7 @@ class GiveawayCog(commands.Cog):
         view = self._build_view(msg.id)
         await msg.edit(view=view)
 
-        async def auto_end():
-            await asyncio.sleep(seconds)
-            if msg.id in self.active_giveaways:
-                await self._end_giveaway(msg.id, interaction.channel.id, interaction.guild.id, hadiah, pemenang, interaction.user.id)
-
-        self.bot.loop.create_task(auto_end())
+        self._schedule_end(msg.id)
 
     @app_commands.command(name="giveaway_end", description="[ADMIN] Akhiri giveaway lebih awal")
     @app_commands.describe(message_id="ID pesan giveaway")
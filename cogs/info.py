@@ -8,16 +8,6 @@ TIKTOK_URL = "https://www.tiktok.com/@panggilan437"
 INFO_CHANNEL_NAME = "📒┃panduan"
 
 
-async def _get_qris_url(bot):
-    try:
-        async with aiosqlite.connect(bot.db.db_name) as db:
-            async with db.execute("SELECT value FROM settings WHERE key = 'qris_url'") as cursor:
-                row = await cursor.fetchone()
-                return row[0] if row else None
-    except Exception:
-        return None
-
-
 async def build_embeds(bot, guild):
     embeds = []
 
@@ -73,7 +63,7 @@ async def build_embeds(bot, guild):
     e2.set_footer(text=f"{STORE_NAME} \u2022 Cara Order")
     embeds.append(e2)
 
-    qris_url = await _get_qris_url(bot)
+    qris_url = await bot.db.get_setting("qris_url")
     e3 = discord.Embed(
         title="\U0001f4b3 Metode Pembayaran",
         description=(
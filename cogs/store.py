@@ -1,5 +1,7 @@
 import json
 import random
+import asyncio
+import hashlib
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -10,7 +12,6 @@ from config import (
     DANA_NUMBER,
     BCA_NUMBER,
 
-    CATEGORY_PRIORITY,
     STORE_THUMBNAIL,
     STORE_BANNER,
 )
@@ -18,10 +19,9 @@ from utils import (
     calculate_total,
     format_items,
     send_invoice,
-    save_products_json,
-    load_products_json,
     is_staff,
 )
+from catalog import Catalog
 
 
 class SpotlightModal(discord.ui.Modal, title="Buat Spotlight"):
@@ -101,61 +101,230 @@ class SpotlightModal(discord.ui.Modal, title="Buat Spotlight"):
         )
 
 
+# ─── Catalog Render ──────────────────────────────────────────────────────────
+
+# Batas Discord: isi field, jumlah field & total karakter per embed, tombol per view
+FIELD_VALUE_LIMIT = 1024
+EMBED_FIELD_LIMIT = 25
+EMBED_CHAR_LIMIT = 6000
+VIEW_BUTTON_LIMIT = 25
+
+# Jeda debounce sebelum catalog permanen diedit setelah produk berubah (detik)
+PIN_UPDATE_DELAY = 3
+
+CATALOG_DESCRIPTION = (
+    "**For Your Information**\n"
+    "- **Silakan tanyakan informasi produk kepada admin sebelum membuka tiket.**\n"
+    "- **Buka tiket hanya jika Anda sudah yakin ingin melakukan pembelian.**\n"
+    "- **Harga item Robux dapat berubah mengikuti rate pasar saat ini.**"
+)
+
+
+def _chunk_lines(lines, limit=FIELD_VALUE_LIMIT):
+    """Gabung baris jadi beberapa value field, masing-masing <= limit (baris tidak dipotong di tengah)"""
+    chunks, current = [], ""
+    for line in lines:
+        line = line[:limit]
+        if current and len(current) + len(line) > limit:
+            chunks.append(current)
+            current = ""
+        current += line
+    if current:
+        chunks.append(current)
+    return chunks or ["-"]
+
+
+def _render_catalog(catalog):
+    """Render Catalog jadi list halaman {"embed": dict, "buttons": [(label, custom_id)]}.
+
+    Kategori yang melebihi 1024 karakter dipecah ke field lanjutan, dan field
+    dibagi ke beberapa embed supaya tidak lewat 25 field / 6000 karakter.
+    Tombol BUY ikut di halaman tempat kategori itu pertama muncul.
+    """
+    fields = []
+    if catalog.spotlight:
+        lines = [f"**{p['name']}** — Rp {p['price']:,}\n" for p in catalog.spotlight]
+        fields += [("SPOTLIGHT", value, None) for value in _chunk_lines(lines)]
+    for cat in catalog.category_order:
+        lines = [
+            f"\u2502 `ID:{item['id']}` {item['name']} — **Rp {item['price']:,}**\n"
+            for item in catalog.in_category(cat)
+        ]
+        for i, value in enumerate(_chunk_lines(lines)):
+            fields.append((f"▎{cat}" if i == 0 else f"▎{cat} (lanjutan)", value, cat if i == 0 else None))
+
+    def new_page(first):
+        if first:
+            embed = discord.Embed(title=f"{STORE_NAME} - READY STOCK", description=CATALOG_DESCRIPTION, color=0x00BFFF)
+            embed.set_thumbnail(url=STORE_THUMBNAIL)
+            embed.set_image(url=STORE_BANNER)
+        else:
+            embed = discord.Embed(title=f"{STORE_NAME} - READY STOCK (lanjutan)", color=0x00BFFF)
+        return {"embed": embed, "buttons": [], "chars": len(embed.title) + len(embed.description or "")}
+
+    pages = [new_page(True)]
+    for name, value, cat in fields:
+        page = pages[-1]
+        size = len(name) + len(value)
+        if (
+            len(page["embed"].fields) >= EMBED_FIELD_LIMIT
+            or page["chars"] + size > EMBED_CHAR_LIMIT
+            or (cat and len(page["buttons"]) >= VIEW_BUTTON_LIMIT)
+        ):
+            page = new_page(False)
+            pages.append(page)
+        page["embed"].add_field(name=name, value=value, inline=False)
+        page["chars"] += size
+        if cat:
+            page["buttons"].append((f"BUY {cat}"[:80], f"buy_{cat}"))
+    return [{"embed": p["embed"].to_dict(), "buttons": p["buttons"]} for p in pages]
+
+
+def _page_view(page):
+    if not page["buttons"]:
+        return None
+    view = discord.ui.View()
+    for label, custom_id in page["buttons"]:
+        view.add_item(discord.ui.Button(label=label, style=discord.ButtonStyle.primary, custom_id=custom_id))
+    return view
+
+
+def _pages_hash(pages):
+    return hashlib.sha1(json.dumps(pages, sort_keys=True).encode()).hexdigest()
+
+
+async def _publish_pages(channel, pages, message_ids):
+    """Edit pesan catalog yang ada di tempat; kirim pesan baru / hapus sisa kalau jumlah halaman berubah"""
+    new_ids = []
+    for i, page in enumerate(pages):
+        embed = discord.Embed.from_dict(page["embed"])
+        view = _page_view(page)
+        message = None
+        if i < len(message_ids):
+            try:
+                message = await channel.get_partial_message(int(message_ids[i])).edit(embed=embed, view=view)
+            except discord.NotFound:
+                message = None
+        if message is None:
+            message = await channel.send(embed=embed, view=view)
+        new_ids.append(message.id)
+    for mid in message_ids[len(pages):]:
+        try:
+            await channel.get_partial_message(int(mid)).delete()
+        except discord.HTTPException:
+            pass
+    return new_ids
+
+
 class StoreCog(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self._catalog_render = {}
+        self._pin_lock = asyncio.Lock()
+        self._pin_task = None
+        self._pin_due = None
+
+    async def cog_load(self):
+        self.bot.products_cache.add_listener(self._on_catalog_changed)
+
+    async def cog_unload(self):
+        self.bot.products_cache.remove_listener(self._on_catalog_changed)
+        if self._pin_task:
+            self._pin_task.cancel()
+
+    async def _save_catalog(self, catalog, product):
+        """Simpan satu produk ke DB (satu statement), lalu pasang catalog barunya. False kalau DB gagal.
+        products.json tidak ditulis ulang di sini, hanya saat /migrate export"""
+        if not await self.bot.db.upsert_product(product):
+            return False
+        self.bot.products_cache.set_catalog(catalog)
+        return True
 
     # ─── Catalog ─────────────────────────────────────────────────
 
     @app_commands.command(name="catalog", description="Lihat semua item")
     async def catalog(self, interaction: discord.Interaction):
         await interaction.response.defer()
-        products = await self.bot.products_cache.get_products()
-
-        spotlight_items = [p for p in products if p.get("spotlight")]
-        categories = {}
-        for p in products:
-            categories.setdefault(p["category"], []).append(p)
-
-        all_cats = list(categories.keys())
-        order = [c for c in CATEGORY_PRIORITY if c in all_cats]
-        order += [c for c in all_cats if c not in order]
-
-        embed = discord.Embed(
-            title=f"{STORE_NAME} - READY STOCK",
-            description="**For Your Information**\n- **Silakan tanyakan informasi produk kepada admin sebelum membuka tiket.**\n- **Buka tiket hanya jika Anda sudah yakin ingin melakukan pembelian.**\n- **Harga item Robux dapat berubah mengikuti rate pasar saat ini.**",
-            color=0x00BFFF,
+        pages = await self._catalog_pages(interaction.guild_id)
+        for page in pages:
+            view = _page_view(page)
+            kwargs = {"view": view} if view else {}
+            await interaction.followup.send(embed=discord.Embed.from_dict(page["embed"]), **kwargs)
+
+    async def _catalog_pages(self, guild_id):
+        """Halaman catalog hasil render, di-cache per guild dan per snapshot catalog"""
+        catalog = await self.bot.products_cache.get_catalog()
+        cached = self._catalog_render.get(guild_id)
+        if cached and cached[0] is catalog:
+            return cached[1]
+        pages = _render_catalog(catalog)
+        self._catalog_render[guild_id] = (catalog, pages)
+        return pages
+
+    @app_commands.command(name="catalogpin", description="[ADMIN] Pasang catalog permanen yang otomatis update")
+    @app_commands.describe(channel="Channel tujuan (default: channel ini)", hapus="Hapus catalog permanen dari channel")
+    async def catalog_pin(self, interaction: discord.Interaction, channel: discord.TextChannel = None, hapus: bool = False):
+        if not is_staff(interaction):
+            await interaction.response.send_message("❌ Admin only!", ephemeral=True)
+            return
+        channel = channel or interaction.channel
+        await interaction.response.defer(ephemeral=True)
+        async with self._pin_lock:
+            pin = (await self.bot.db.load_catalog_pins()).get(str(channel.id))
+            if hapus:
+                if not pin:
+                    await interaction.followup.send(f"❌ Tidak ada catalog permanen di {channel.mention}.", ephemeral=True)
+                    return
+                for mid in pin["message_ids"]:
+                    try:
+                        await channel.get_partial_message(int(mid)).delete()
+                    except discord.HTTPException:
+                        pass
+                await self.bot.db.delete_catalog_pin(channel.id)
+                await interaction.followup.send(f"🗑️ Catalog permanen di {channel.mention} dihapus.", ephemeral=True)
+                return
+            pages = await self._catalog_pages(interaction.guild_id)
+            message_ids = await _publish_pages(channel, pages, pin["message_ids"] if pin else [])
+            await self.bot.db.save_catalog_pin(channel.id, interaction.guild_id, message_ids, _pages_hash(pages))
+        await interaction.followup.send(
+            f"✅ Catalog permanen dipasang di {channel.mention}.\nPesan akan diedit otomatis setiap produk berubah.",
+            ephemeral=True,
         )
-        embed.set_thumbnail(url=STORE_THUMBNAIL)
-        embed.set_image(url=STORE_BANNER)
 
-        if spotlight_items:
-            value = "".join(
-                f"**{p['name']}** — Rp {p['price']:,}\n"
-                for p in spotlight_items
-            )
-            embed.add_field(name="SPOTLIGHT", value=value, inline=False)
-
-        for cat in order:
-            if cat in categories:
-                items = categories[cat]
-                value = "".join(
-                    f"\u2502 `ID:{item['id']}` {item['name']} — **Rp {item['price']:,}**\n"
-                    for item in items
-                )
-                embed.add_field(name=f"▎{cat}", value=value[:1024] or "-", inline=False)
-
-        view = discord.ui.View()
-        for cat in order:
-            if cat in categories:
-                view.add_item(discord.ui.Button(
-                    label=f"BUY {cat}",
-                    style=discord.ButtonStyle.primary,
-                    custom_id=f"buy_{cat}",
-                ))
-
-        await interaction.followup.send(embed=embed, view=view)
+    def _on_catalog_changed(self, catalog):
+        # Debounce: perubahan beruntun (mis. import) digabung jadi satu edit setelah jeda
+        self._pin_due = asyncio.get_running_loop().time() + PIN_UPDATE_DELAY
+        if self._pin_task is None or self._pin_task.done():
+            self._pin_task = asyncio.create_task(self._pin_update_loop())
+
+    async def _pin_update_loop(self):
+        await self.bot.wait_until_ready()
+        loop = asyncio.get_running_loop()
+        while self._pin_due is not None:
+            delay = self._pin_due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            self._pin_due = None
+            try:
+                await self._update_pins()
+            except Exception as e:
+                print(f"❌ Error update catalog pin: {e}")
+
+    async def _update_pins(self):
+        async with self._pin_lock:
+            for channel_id, pin in (await self.bot.db.load_catalog_pins()).items():
+                channel = self.bot.get_channel(int(channel_id))
+                if not channel:
+                    continue
+                pages = await self._catalog_pages(int(pin["guild_id"]))
+                content_hash = _pages_hash(pages)
+                if content_hash == pin["content_hash"] and len(pin["message_ids"]) == len(pages):
+                    continue
+                message_ids = await _publish_pages(channel, pages, pin["message_ids"])
+                await self.bot.db.save_catalog_pin(channel_id, pin["guild_id"], message_ids, content_hash)
+                print(f"✓ Catalog pin di #{channel.name} diupdate")
 
     @app_commands.command(name="help", description=f"Bantuan menggunakan bot {STORE_NAME}")
     async def help_command(self, interaction: discord.Interaction):
@@ -283,17 +452,17 @@ class StoreCog(commands.Cog):
         if not is_staff(interaction):
             await interaction.response.send_message("❌ Admin only!", ephemeral=True)
             return
-        if any(p["id"] == id for p in self.bot.PRODUCTS):
+        catalog = await self.bot.products_cache.get_catalog()
+        if id in catalog:
             await interaction.response.send_message(f"❌ ID {id} sudah dipakai!", ephemeral=True)
             return
         if price <= 0:
             await interaction.response.send_message("❌ Harga harus lebih dari 0!", ephemeral=True)
             return
         new_product = {"id": id, "name": name, "price": price, "category": category.upper()}
-        self.bot.PRODUCTS.append(new_product)
-        save_products_json(self.bot.PRODUCTS)
-        await self.bot.db.save_products(self.bot.PRODUCTS)
-        self.bot.products_cache.invalidate()
+        if not await self._save_catalog(catalog.with_product(new_product), new_product):
+            await interaction.response.send_message("❌ Gagal menyimpan ke database!", ephemeral=True)
+            return
         embed = discord.Embed(
             title="✅ PRODUK DITAMBAHKAN",
             description=f"**ID:** {id}\n**Nama:** {name}\n**Harga:** Rp {price:,}\n**Kategori:** {category.upper()}",
@@ -307,7 +476,8 @@ class StoreCog(commands.Cog):
         if not is_staff(interaction):
             await interaction.response.send_message("❌ Admin only!", ephemeral=True)
             return
-        item = next((p for p in self.bot.PRODUCTS if p["id"] == item_id), None)
+        catalog = await self.bot.products_cache.get_catalog()
+        item = catalog.get(item_id)
         if not item:
             await interaction.response.send_message("❌ Item tidak ditemukan!", ephemeral=True)
             return
@@ -315,10 +485,10 @@ class StoreCog(commands.Cog):
             await interaction.response.send_message("❌ Harga harus lebih dari 0!", ephemeral=True)
             return
         old_price = item["price"]
-        item["price"] = new_price
-        save_products_json(self.bot.PRODUCTS)
-        await self.bot.db.save_products(self.bot.PRODUCTS)
-        self.bot.products_cache.invalidate()
+        item = {**item, "price": new_price}
+        if not await self._save_catalog(catalog.with_product(item), item):
+            await interaction.response.send_message("❌ Gagal menyimpan ke database!", ephemeral=True)
+            return
         embed = discord.Embed(
             title="💰 HARGA DIUPDATE",
             description=f"**Item:** {item['name']}\n**Lama:** Rp {old_price:,}\n**Baru:** Rp {new_price:,}",
@@ -332,15 +502,16 @@ class StoreCog(commands.Cog):
         if not is_staff(interaction):
             await interaction.response.send_message("❌ Admin only!", ephemeral=True)
             return
-        item = next((p for p in self.bot.PRODUCTS if p["id"] == item_id), None)
+        catalog = await self.bot.products_cache.get_catalog()
+        item = catalog.get(item_id)
         if not item:
             await interaction.response.send_message("❌ Item tidak ditemukan!", ephemeral=True)
             return
         old_name = item["name"]
-        item["name"] = new_name
-        save_products_json(self.bot.PRODUCTS)
-        await self.bot.db.save_products(self.bot.PRODUCTS)
-        self.bot.products_cache.invalidate()
+        item = {**item, "name": new_name}
+        if not await self._save_catalog(catalog.with_product(item), item):
+            await interaction.response.send_message("❌ Gagal menyimpan ke database!", ephemeral=True)
+            return
         embed = discord.Embed(
             title="📝 NAMA DIUPDATE",
             description=f"**ID:** {item_id}\n**Lama:** {old_name}\n**Baru:** {new_name}",
@@ -354,14 +525,15 @@ class StoreCog(commands.Cog):
         if not is_staff(interaction):
             await interaction.response.send_message("❌ Admin only!", ephemeral=True)
             return
-        item = next((p for p in self.bot.PRODUCTS if p["id"] == item_id), None)
+        catalog = await self.bot.products_cache.get_catalog()
+        item = catalog.get(item_id)
         if not item:
             await interaction.response.send_message("❌ Item tidak ditemukan!", ephemeral=True)
             return
-        self.bot.PRODUCTS.remove(item)
-        save_products_json(self.bot.PRODUCTS)
-        await self.bot.db.save_products(self.bot.PRODUCTS)
-        self.bot.products_cache.invalidate()
+        if not await self.bot.db.delete_product(item_id):
+            await interaction.response.send_message("❌ Gagal menyimpan ke database!", ephemeral=True)
+            return
+        self.bot.products_cache.set_catalog(catalog.without_product(item_id))
         embed = discord.Embed(
             title="🗑️ ITEM DIHAPUS",
             description=f"**ID:** {item_id}\n**Nama:** {item['name']}\n**Harga:** Rp {item['price']:,}",
@@ -382,18 +554,19 @@ class StoreCog(commands.Cog):
         if not is_staff(interaction):
             await interaction.response.send_message("❌ Admin only!", ephemeral=True)
             return
-        item = next((p for p in self.bot.PRODUCTS if p["id"] == item_id), None)
+        catalog = await self.bot.products_cache.get_catalog()
+        item = catalog.get(item_id)
         if not item:
             await interaction.response.send_message("❌ Item tidak ditemukan!", ephemeral=True)
             return
         # Limit spotlight maksimal 5
-        spotlight_count = sum(1 for p in self.bot.PRODUCTS if p.get("spotlight"))
-        if spotlight_count >= 5 and not item.get("spotlight"):
+        if len(catalog.spotlight) >= 5 and not item.get("spotlight"):
             await interaction.response.send_message("❌ Maksimal 5 produk spotlight! Hapus salah satu dulu dengan /unsetspotlight.", ephemeral=True)
             return
-        item["spotlight"] = 1
-        await self.bot.db.set_spotlight(item_id, 1)
-        self.bot.products_cache.invalidate()
+        if not await self.bot.db.set_spotlight(item_id, 1):
+            await interaction.response.send_message("❌ Gagal menyimpan ke database!", ephemeral=True)
+            return
+        self.bot.products_cache.set_catalog(catalog.with_product({**item, "spotlight": 1}))
         embed = discord.Embed(
             title="SPOTLIGHT DIAKTIFKAN",
             description=f"**{item['name']}** sekarang tampil di spotlight catalog!",
@@ -407,13 +580,15 @@ class StoreCog(commands.Cog):
         if not is_staff(interaction):
             await interaction.response.send_message("❌ Admin only!", ephemeral=True)
             return
-        item = next((p for p in self.bot.PRODUCTS if p["id"] == item_id), None)
+        catalog = await self.bot.products_cache.get_catalog()
+        item = catalog.get(item_id)
         if not item:
             await interaction.response.send_message("❌ Item tidak ditemukan!", ephemeral=True)
             return
-        item["spotlight"] = 0
-        await self.bot.db.set_spotlight(item_id, 0)
-        self.bot.products_cache.invalidate()
+        if not await self.bot.db.set_spotlight(item_id, 0):
+            await interaction.response.send_message("❌ Gagal menyimpan ke database!", ephemeral=True)
+            return
+        self.bot.products_cache.set_catalog(catalog.with_product({**item, "spotlight": 0}))
         embed = discord.Embed(
             title="🔦 SPOTLIGHT DINONAKTIFKAN",
             description=f"**{item['name']}** dihapus dari spotlight.",
@@ -426,8 +601,7 @@ class StoreCog(commands.Cog):
         if not is_staff(interaction):
             await interaction.response.send_message("❌ Admin only!", ephemeral=True)
             return
-        products = await self.bot.products_cache.get_products()
-        spotlight = [p for p in products if p.get("spotlight")]
+        spotlight = (await self.bot.products_cache.get_catalog()).spotlight
         if not spotlight:
             await interaction.response.send_message("📝 Belum ada produk spotlight.", ephemeral=True)
             return
@@ -439,9 +613,9 @@ class StoreCog(commands.Cog):
         if not is_staff(interaction):
             await interaction.response.send_message("❌ Admin only!", ephemeral=True)
             return
-        await self.bot.products_cache.refresh()
+        catalog = await self.bot.products_cache.refresh()
         await interaction.response.send_message(
-            f"✅ Cache refreshed! {len(self.bot.products_cache.data)} products loaded"
+            f"✅ Cache refreshed! {len(catalog)} products loaded"
         )
 
     @app_commands.command(name="importproduk", description="[ADMIN] Import produk dari file Excel/CSV")
@@ -510,25 +684,27 @@ class StoreCog(commands.Cog):
                 await interaction.followup.send("❌ Tidak ada produk yang bisa diimport. Pastikan format kolom: `id`, `name`, `price`, `category`")
                 return
 
-            # Merge ke PRODUCTS yang ada
+            # Merge ke catalog yang ada
             added, updated = 0, 0
-            existing_ids = {p["id"]: i for i, p in enumerate(self.bot.PRODUCTS)}
+            catalog = await self.bot.products_cache.get_catalog()
+            merged = dict(catalog.by_id)
             for p in products:
-                if p["id"] in existing_ids:
-                    self.bot.PRODUCTS[existing_ids[p["id"]]].update({
-                        "name": p["name"], "price": p["price"], "category": p["category"]
-                    })
+                if p["id"] in merged:
+                    merged[p["id"]] = {
+                        **merged[p["id"]], "name": p["name"], "price": p["price"], "category": p["category"]
+                    }
                     updated += 1
                 else:
-                    self.bot.PRODUCTS.append(p)
+                    merged[p["id"]] = p
                     added += 1
 
-            self.bot.PRODUCTS.sort(key=lambda x: x["id"])
-            save_products_json(self.bot.PRODUCTS)
-            await self.bot.db.save_products(self.bot.PRODUCTS)
-            self.bot.products_cache.invalidate()
+            if not await self.bot.db.upsert_products(products):
+                await interaction.followup.send("❌ Gagal menyimpan produk ke database!")
+                return
+            catalog = Catalog(merged.values())
+            self.bot.products_cache.set_catalog(catalog)
 
-            desc = f"✅ **{added}** produk ditambahkan\n✏️ **{updated}** produk diupdate\n📦 Total: **{len(self.bot.PRODUCTS)}** produk"
+            desc = f"✅ **{added}** produk ditambahkan\n✏️ **{updated}** produk diupdate\n📦 Total: **{len(catalog)}** produk"
             if errors:
                 desc += f"\n\n⚠️ **{len(errors)} baris dilewati:**\n" + "\n".join(errors[:5])
 
@@ -543,10 +719,10 @@ class StoreCog(commands.Cog):
         if not is_staff(interaction):
             await interaction.response.send_message("❌ Admin only!", ephemeral=True)
             return
-        self.bot.PRODUCTS = load_products_json()
+        catalog = await self.bot.products_cache.refresh()
         embed = discord.Embed(
             title="🔄 CATALOG REFRESHED",
-            description=f"Total item: {len(self.bot.PRODUCTS)}",
+            description=f"Total item: {len(catalog)}",
             color=0x00BFFF,
         )
         await interaction.response.send_message(embed=embed)
@@ -600,10 +776,10 @@ class StoreCog(commands.Cog):
         if not last_5:
             await interaction.response.send_message("Belum ada transaksi.", ephemeral=True)
             return
-        all_user = await self.bot.db.get_user_transactions(user_id, limit=1000)
+        summary = await self.bot.db.get_user_summary(user_id)
         embed = discord.Embed(
             title="RIWAYAT TRANSAKSI",
-            description=f"Total: {len(all_user)} transaksi",
+            description=f"Total: {summary['count']} transaksi",
             color=0x00BFFF,
         )
         for t in reversed(last_5):
@@ -625,17 +801,17 @@ class StoreCog(commands.Cog):
         if not is_staff(interaction):
             await interaction.response.send_message("❌ Admin only!", ephemeral=True)
             return
-        all_trans = await self.bot.db.get_user_transactions(str(user.id), limit=1000)
-        if not all_trans:
+        summary = await self.bot.db.get_user_summary(str(user.id))
+        if not summary["count"]:
             await interaction.response.send_message(f"📝 {user.mention} belum punya transaksi.", ephemeral=True)
             return
-        total_spent = sum(t["total_price"] for t in all_trans)
+        last_10 = await self.bot.db.get_user_transactions(str(user.id), limit=10)
         embed = discord.Embed(
             title=f"📋 SEMUA TRANSAKSI {user.name}",
-            description=f"Total: **{len(all_trans)}** | Belanja: **Rp {total_spent:,}**",
+            description=f"Total: **{summary['count']}** | Belanja: **Rp {summary['total']:,}**",
             color=0x00BFFF,
         )
-        for t in all_trans[-10:]:
+        for t in last_10:
             ts = t["timestamp"] if isinstance(t["timestamp"], datetime) else datetime.fromisoformat(t["timestamp"])
             items = t["items"] if isinstance(t["items"], list) else json.loads(t["items"])
             items_short = ", ".join(f"{i['qty']}x {i['name'][:15]}" for i in items[:2])
@@ -646,8 +822,8 @@ class StoreCog(commands.Cog):
                 value=f"{items_short} | Rp {t['total_price']:,} | {t.get('payment_method', '-')}",
                 inline=False,
             )
-        if len(all_trans) > 10:
-            embed.set_footer(text=f"Menampilkan 10 dari {len(all_trans)} transaksi")
+        if summary["count"] > 10:
+            embed.set_footer(text=f"Menampilkan 10 dari {summary['count']} transaksi")
         await interaction.response.send_message(embed=embed)
 
     # ─── Fake Invoice ────────────────────────────────────────────
@@ -664,9 +840,10 @@ class StoreCog(commands.Cog):
         await interaction.response.send_message(f"🧪 Generating {jumlah} fake invoice...", ephemeral=True, delete_after=3)
         methods = ["DANA", "BCA", "QRIS"]
         weights = [0.5, 0.3, 0.2]
+        catalog = await self.bot.products_cache.get_catalog()
         for _ in range(jumlah):
             num_items = random.choices([1, 2, 3], weights=[0.6, 0.3, 0.1])[0]
-            selected = random.sample(self.bot.PRODUCTS, k=min(num_items, len(self.bot.PRODUCTS)))
+            selected = random.sample(catalog.products, k=min(num_items, len(catalog)))
             items = [
                 {"id": p["id"], "name": p["name"], "price": p["price"], "qty": random.randint(1, 3)}
                 for p in selected
@@ -697,7 +874,7 @@ class StoreCog(commands.Cog):
         if channel_id not in self.bot.active_tickets or self.bot.active_tickets[channel_id]["status"] != "OPEN":
             await interaction.response.send_message("❌ Tiket tidak ditemukan atau sudah closed!", ephemeral=True)
             return
-        item = next((p for p in self.bot.PRODUCTS if p["id"] == item_id), None)
+        item = (await self.bot.products_cache.get_catalog()).get(item_id)
         if not item:
             await interaction.response.send_message("❌ Item tidak ditemukan!", ephemeral=True)
             return
@@ -715,8 +892,8 @@ class StoreCog(commands.Cog):
         if not found:
             ticket["items"].append({"id": item["id"], "name": item["name"], "price": item["price"], "qty": qty})
         ticket["total_price"] = calculate_total(ticket["items"])
-        await self.bot.db.update_ticket_items(channel_id, ticket["items"])
-        await self.bot.db.update_ticket_total(channel_id, ticket["total_price"])
+        self.bot.active_tickets.touch(channel_id)
+        await self.bot.active_tickets.flush(channel_id)
         embed = discord.Embed(
             title="➕ ITEM DITAMBAHKAN",
             description=f"**{qty}x {item['name']}** berhasil ditambahkan!",
@@ -752,14 +929,13 @@ class StoreCog(commands.Cog):
             item_found["qty"] -= qty
             removal_msg = f"✅ **{qty}x {item_found['name']}** dikurangi!\nSisa: {item_found['qty']}x"
         ticket["total_price"] = calculate_total(ticket["items"])
-        await self.bot.db.update_ticket_items(channel_id, ticket["items"])
-        await self.bot.db.update_ticket_total(channel_id, ticket["total_price"])
+        self.bot.active_tickets.touch(channel_id)
+        await self.bot.active_tickets.flush(channel_id)
         if not ticket["items"]:
             await interaction.response.send_message("🔄 Tiket kosong, menutup tiket dalam 5 detik...")
             import asyncio
             await asyncio.sleep(5)
-            del self.bot.active_tickets[channel_id]
-            await self.bot.db.delete_ticket(channel_id)
+            await self.bot.active_tickets.remove(channel_id)
             await interaction.channel.delete()
             return
         embed = discord.Embed(title="➖ ITEM DIHAPUS", description=removal_msg, color=0x00BFFF)
@@ -1,6 +1,6 @@
+import time
 import asyncio
 import random
-import aiosqlite
 import discord
 from discord.ext import commands
 from datetime import datetime
@@ -13,12 +13,32 @@ from utils import (
     get_log_channel,
 )
 
+# Pesan qty tiket diedit paling banyak sekali per jendela ini (klik +/- beruntun digabung)
+QTY_EDIT_WINDOW = 1.5
+
+# Reminder dikirim setelah tiket OPEN sepi selama ini, lalu diulang dengan jeda yang sama
+TICKET_REMINDER_AFTER = 3600
+
+
+def _last_activity(ticket):
+    if ticket.get("last_activity"):
+        return ticket["last_activity"]
+    created_at = ticket["created_at"]
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    return int(created_at.timestamp())
+
+
+def _reminder_due(ticket):
+    """Epoch reminder berikutnya: TICKET_REMINDER_AFTER sejak aktivitas / reminder terakhir"""
+    return max(_last_activity(ticket), ticket.get("reminded_at") or 0) + TICKET_REMINDER_AFTER
+
 
 async def _send_item_buttons(channel, ticket, products_cache):
     try:
+        catalog = await products_cache.get_catalog()
         for entry in ticket["items"]:
-            products = await products_cache.get_products()
-            item = next((p for p in products if p["id"] == entry["id"]), None)
+            item = catalog.get(entry["id"])
             if item:
                 view = discord.ui.View()
                 view.add_item(discord.ui.Button(
@@ -37,310 +57,473 @@ async def _send_item_buttons(channel, ticket, products_cache):
         print(f"❌ Error send_item_buttons: {e}")
 
 
-class TicketCog(commands.Cog):
+def _category_page_payload(catalog, category, page):
+    """Embed + view satu halaman kategori: select menu (maks 25 item) dan tombol prev/next"""
+    items, page, total_pages = catalog.category_page(category, page)
+    title = f"📦 {category}"
+    if total_pages > 1:
+        title += f" ({page + 1}/{total_pages})"
+    embed = discord.Embed(
+        title=title,
+        description="".join(
+            f"`ID:{item['id']}` {item['name']} — **Rp {item['price']:,}**\n" for item in items
+        ) or "Belum ada item di kategori ini.",
+        color=0x00BFFF,
+    )
+    embed.set_footer(text="Pilih item dari menu di bawah untuk buka tiket")
+    view = discord.ui.View()
+    if items:
+        view.add_item(discord.ui.Select(
+            custom_id=f"pick_{category}"[:100],
+            placeholder="Pilih item yang mau dibeli...",
+            options=[
+                discord.SelectOption(
+                    label=item["name"][:100],
+                    description=f"ID:{item['id']} — Rp {item['price']:,}"[:100],
+                    value=str(item["id"]),
+                )
+                for item in items
+            ],
+        ))
+    if total_pages > 1:
+        view.add_item(discord.ui.Button(
+            label="◀ Prev", style=discord.ButtonStyle.secondary,
+            custom_id=f"catpage_{page - 1}_{category}"[:100], disabled=page == 0,
+        ))
+        view.add_item(discord.ui.Button(
+            label="Next ▶", style=discord.ButtonStyle.secondary,
+            custom_id=f"catpage_{page + 1}_{category}"[:100], disabled=page >= total_pages - 1,
+        ))
+    return embed, view
+
+
+class ConfirmPaymentView(discord.ui.View):
+    """Tombol PAID di tiket (persistent, custom_id tetap)"""
+
+    def __init__(self, cog):
+        super().__init__(timeout=None)
+        self.cog = cog
+
+    @discord.ui.button(label="PAID", style=discord.ButtonStyle.success, custom_id="confirm_payment")
+    async def paid(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if await self.cog._rejected(interaction):
+            return
+        await self.cog._confirm_payment(interaction)
 
-    def __init__(self, bot: commands.Bot):
-        self.bot = bot
-        self._processed_interactions = set()
 
-    @commands.Cog.listener()
-    async def on_interaction(self, interaction: discord.Interaction):
-        if interaction.type != discord.InteractionType.component:
-            return
+class VerifyPaymentView(discord.ui.View):
+    """Tombol verifikasi pembayaran untuk admin (persistent, custom_id tetap)"""
+
+    def __init__(self, cog):
+        super().__init__(timeout=None)
+        self.cog = cog
 
-        # Cegah interaction diproses dua kali (race condition)
-        iid = interaction.id
-        if iid in self._processed_interactions:
+    @discord.ui.button(label="✅ Verifikasi Pembayaran", style=discord.ButtonStyle.success, custom_id="verify_payment")
+    async def verify(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if await self.cog._rejected(interaction):
             return
-        self._processed_interactions.add(iid)
-        if len(self._processed_interactions) > 200:
-            self._processed_interactions = set(list(self._processed_interactions)[-100:])
+        await self.cog._verify_payment(interaction)
 
-        custom_id = interaction.data.get("custom_id", "")
-        user_id = str(interaction.user.id)
 
-        if user_id in self.bot.blacklist:
-            try:
-                await interaction.response.send_message(
-                    f"Kamu diblacklist dari {STORE_NAME}.", ephemeral=True
-                )
-            except Exception:
-                pass
-            return
+class TicketCog(commands.Cog):
 
-        # ─── Catalog Browse ──────────────────────────────────────
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._qty_pending = {}  # channel_id: {"content": teks terbaru yang belum dikirim}
 
-        if custom_id.startswith("buy_"):
-            category = custom_id.replace("buy_", "")
-            items = [p for p in self.bot.PRODUCTS if p["category"] == category]
-            embed = discord.Embed(
-                title=f"📦 {category}",
-                description="Klik item yang mau dibeli:",
-                color=0x00BFFF,
-            )
-            for item in items[:10]:
-                embed.add_field(
-                    name=f"ID:{item['id']} — {item['name']}",
-                    value=f"Rp {item['price']:,}",
-                    inline=True,
+    async def _open_ticket(self, interaction: discord.Interaction, item):
+        user_id = str(interaction.user.id)
+        user = interaction.user
+        guild = interaction.guild
+
+        existing = self.bot.active_tickets.open_ticket_of(user_id)
+        if existing:
+            existing_channel = interaction.guild.get_channel(int(existing["channel_id"]))
+            if existing_channel:
+                await interaction.response.send_message(
+                    f"❌ Kamu masih punya tiket aktif di {existing_channel.mention}!\n"
+                    f"Selesaikan atau ketik `!cancel` di sana dulu sebelum buka tiket baru.",
+                    ephemeral=True,
                 )
-            view = discord.ui.View()
-            for item in items[:10]:
-                view.add_item(discord.ui.Button(
-                    label=f"{item['name'][:30]} — Rp {item['price']:,}",
-                    style=discord.ButtonStyle.secondary,
-                    custom_id=f"item_{item['id']}",
-                ))
+                return
+            # Channel sudah tidak ada, hapus tiket lama
+            await self.bot.active_tickets.remove(existing["channel_id"])
+
+        # Defer dulu sebelum operasi yang butuh waktu lama
+        await interaction.response.defer(ephemeral=True)
+
+        category = discord.utils.get(guild.categories, name="TICKETS")
+        if not category:
+            category = await guild.create_category("TICKETS")
+
+        staff_role = discord.utils.get(guild.roles, name=STAFF_ROLE_NAME)
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            user: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+            guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+        }
+        if staff_role:
+            overwrites[staff_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+
+        channel = await guild.create_text_channel(
+            name=f"ticket-{user.name}-{random.randint(100, 999)}",
+            category=category,
+            overwrites=overwrites,
+        )
+
+        ticket = {
+            "channel_id": str(channel.id),
+            "user_id": user_id,
+            "items": [{"id": item["id"], "name": item["name"], "price": item["price"], "qty": 1}],
+            "total_price": item["price"],
+            "status": "OPEN",
+            "payment_method": None,
+            "created_at": datetime.now().isoformat(),
+        }
+        await self.bot.active_tickets.add(ticket)
+        self._schedule_reminder(str(channel.id))
+
+        embed = discord.Embed(
+            title="TIKET PEMBELIAN",
+            color=0x00BFFF,
+        )
+        embed.add_field(name="Customer", value=user.mention, inline=True)
+        embed.add_field(name="Item", value=item['name'], inline=True)
+        harga_value = f"Rp {item['price']:,}"
+        if item.get('category', '').upper() not in ['NITRO', 'RED FINGER']:
+            harga_value += "\n*Harga Robux mengikuti rate pasar, konfirmasi ke admin untuk harga terkini*"
+        embed.add_field(name="Harga", value=harga_value, inline=True)
+        embed.add_field(
+            name="Metode Pembayaran",
+            value="Ketik **1** — QRIS  |  **2** — DANA  |  **3** — BCA",
+            inline=False,
+        )
+        embed.add_field(
+            name="Qty",
+            value="Gunakan tombol + / - di bawah untuk ubah jumlah item.",
+            inline=False,
+        )
+        embed.set_thumbnail(url=STORE_THUMBNAIL)
+        embed.set_footer(text=f"{STORE_NAME} • Ketik !cancel untuk batalkan", icon_url=STORE_THUMBNAIL)
+
+        qty_view = discord.ui.View()
+        qty_view.add_item(discord.ui.Button(
+            label=f"+ {item['name'][:20]}",
+            style=discord.ButtonStyle.primary,
+            custom_id=f"ticket_add_{item['id']}",
+        ))
+        qty_view.add_item(discord.ui.Button(
+            label=f"- {item['name'][:20]}",
+            style=discord.ButtonStyle.danger,
+            custom_id=f"ticket_remove_{item['id']}",
+        ))
+
+        await channel.send(embed=embed, view=qty_view)
+
+        if staff_role:
+            await channel.send(f"Tiket baru dari {user.mention} | {staff_role.mention}")
+
+        await interaction.followup.send(
+            f"✅ Tiket dibuat! {channel.mention}", ephemeral=True
+        )
+
+    async def cog_load(self):
+        router = self.bot.router
+        router.register("buy_", self._guarded(self._on_buy))
+        router.register("catpage_", self._guarded(self._on_catpage))
+        router.register("item_", self._guarded(self._on_item))
+        router.register("pick_", self._guarded(self._on_pick))
+        router.register("ticket_add_", self._guarded(self._on_qty_add))
+        router.register("ticket_remove_", self._guarded(self._on_qty_remove))
+        # Tombol PAID / verifikasi punya custom_id tetap → persistent view, tetap jalan setelah restart
+        self.bot.add_view(ConfirmPaymentView(self))
+        self.bot.add_view(VerifyPaymentView(self))
+        router.mark_view_owned("confirm_payment")
+        router.mark_view_owned("verify_payment")
+
+    async def cog_unload(self):
+        for key in ("buy_", "catpage_", "item_", "pick_", "ticket_add_", "ticket_remove_"):
+            self.bot.router.unregister(key)
+
+    async def _rejected(self, interaction: discord.Interaction):
+        """Klik persistent view: tolak kalau duplikat atau user diblacklist"""
+        if self.bot.interaction_dedup.seen(interaction.id):
+            return True
+        return await self._blacklisted(interaction)
+
+    async def _blacklisted(self, interaction: discord.Interaction):
+        if str(interaction.user.id) not in self.bot.blacklist:
+            return False
+        try:
             await interaction.response.send_message(
-                embed=embed, view=view, ephemeral=True, delete_after=30
+                f"Kamu diblacklist dari {STORE_NAME}.", ephemeral=True
             )
+        except Exception:
+            pass
+        return True
 
-        # ─── Open Ticket ─────────────────────────────────────────
-
-        elif custom_id.startswith("item_"):
-            item_id = int(custom_id.replace("item_", ""))
-            item = next((p for p in self.bot.PRODUCTS if p["id"] == item_id), None)
-            if not item:
-                await interaction.response.send_message("Item tidak ditemukan!", ephemeral=True)
+    def _guarded(self, handler):
+        async def wrapper(interaction, arg):
+            if await self._blacklisted(interaction):
                 return
+            await handler(interaction, arg)
+        return wrapper
 
-            user = interaction.user
-            guild = interaction.guild
-
-            for t in self.bot.active_tickets.values():
-                if t["user_id"] == user_id and t["status"] == "OPEN":
-                    existing_channel = interaction.guild.get_channel(int(t["channel_id"]))
-                    if existing_channel:
-                        await interaction.response.send_message(
-                            f"❌ Kamu masih punya tiket aktif di {existing_channel.mention}!\n"
-                            f"Selesaikan atau ketik `!cancel` di sana dulu sebelum buka tiket baru.",
-                            ephemeral=True,
-                        )
-                    else:
-                        # Channel sudah tidak ada, hapus tiket lama
-                        self.bot.active_tickets.pop(t["channel_id"], None)
-                        await self.bot.db.delete_ticket(t["channel_id"])
-                        break
-                    return
-
-            # Defer dulu sebelum operasi yang butuh waktu lama
-            await interaction.response.defer(ephemeral=True)
-
-            category = discord.utils.get(guild.categories, name="TICKETS")
-            if not category:
-                category = await guild.create_category("TICKETS")
+    # ─── Catalog Browse ──────────────────────────────────────
 
-            staff_role = discord.utils.get(guild.roles, name=STAFF_ROLE_NAME)
-            overwrites = {
-                guild.default_role: discord.PermissionOverwrite(read_messages=False),
-                user: discord.PermissionOverwrite(read_messages=True, send_messages=True),
-                guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True),
-            }
-            if staff_role:
-                overwrites[staff_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+    async def _on_buy(self, interaction: discord.Interaction, category):
+        catalog = await self.bot.products_cache.get_catalog()
+        embed, view = _category_page_payload(catalog, category, 0)
+        await interaction.response.send_message(
+            embed=embed, view=view, ephemeral=True, delete_after=120
+        )
 
-            channel = await guild.create_text_channel(
-                name=f"ticket-{user.name}-{random.randint(100, 999)}",
-                category=category,
-                overwrites=overwrites,
-            )
+    async def _on_catpage(self, interaction: discord.Interaction, arg):
+        # Ganti halaman: edit pesan yang sama, bukan kirim pesan baru
+        page, category = arg.split("_", 1)
+        catalog = await self.bot.products_cache.get_catalog()
+        embed, view = _category_page_payload(catalog, category, int(page))
+        await interaction.response.edit_message(embed=embed, view=view)
 
-            ticket = {
-                "channel_id": str(channel.id),
-                "user_id": user_id,
-                "items": [{"id": item["id"], "name": item["name"], "price": item["price"], "qty": 1}],
-                "total_price": item["price"],
-                "status": "OPEN",
-                "payment_method": None,
-                "created_at": datetime.now().isoformat(),
-            }
-            await self.bot.db.save_ticket(
-                channel_id=str(channel.id),
-                user_id=user_id,
-                items=ticket["items"],
-                total_price=ticket["total_price"],
-            )
-            self.bot.active_tickets[str(channel.id)] = ticket
+    # ─── Open Ticket ─────────────────────────────────────────
 
-            embed = discord.Embed(
-                title="TIKET PEMBELIAN",
-                color=0x00BFFF,
-            )
-            embed.add_field(name="Customer", value=user.mention, inline=True)
-            embed.add_field(name="Item", value=item['name'], inline=True)
-            harga_value = f"Rp {item['price']:,}"
-            if item.get('category', '').upper() not in ['NITRO', 'RED FINGER']:
-                harga_value += "\n*Harga Robux mengikuti rate pasar, konfirmasi ke admin untuk harga terkini*"
-            embed.add_field(name="Harga", value=harga_value, inline=True)
-            embed.add_field(
-                name="Metode Pembayaran",
-                value="Ketik **1** — QRIS  |  **2** — DANA  |  **3** — BCA",
-                inline=False,
-            )
-            embed.add_field(
-                name="Qty",
-                value="Gunakan tombol + / - di bawah untuk ubah jumlah item.",
-                inline=False,
-            )
-            embed.set_thumbnail(url=STORE_THUMBNAIL)
-            embed.set_footer(text=f"{STORE_NAME} • Ketik !cancel untuk batalkan", icon_url=STORE_THUMBNAIL)
-
-            qty_view = discord.ui.View()
-            qty_view.add_item(discord.ui.Button(
-                label=f"+ {item['name'][:20]}",
-                style=discord.ButtonStyle.primary,
-                custom_id=f"ticket_add_{item['id']}",
-            ))
-            qty_view.add_item(discord.ui.Button(
-                label=f"- {item['name'][:20]}",
-                style=discord.ButtonStyle.danger,
-                custom_id=f"ticket_remove_{item['id']}",
-            ))
-
-            await channel.send(embed=embed, view=qty_view)
+    async def _on_item(self, interaction: discord.Interaction, arg):
+        await self._open_ticket_for(interaction, int(arg))
 
-            if staff_role:
-                await channel.send(f"Tiket baru dari {user.mention} | {staff_role.mention}")
+    async def _on_pick(self, interaction: discord.Interaction, category):
+        await self._open_ticket_for(interaction, int(interaction.data["values"][0]))
 
-            await interaction.followup.send(
-                f"✅ Tiket dibuat! {channel.mention}", ephemeral=True
-            )
+    async def _open_ticket_for(self, interaction: discord.Interaction, item_id):
+        item = (await self.bot.products_cache.get_catalog()).get(item_id)
+        if not item:
+            await interaction.response.send_message("Item tidak ditemukan!", ephemeral=True)
+            return
+        await self._open_ticket(interaction, item)
 
-        # ─── Ticket Qty Buttons ───────────────────────────────────
+    # ─── Ticket Qty Buttons ───────────────────────────────────
 
-        elif custom_id.startswith("ticket_add_") or custom_id.startswith("ticket_remove_"):
-            try:
-                await interaction.response.defer()
-            except Exception:
-                return
+    async def _on_qty_add(self, interaction: discord.Interaction, arg):
+        await self._change_qty(interaction, arg, is_add=True)
 
-            is_add = custom_id.startswith("ticket_add_")
-            item_id = int(custom_id.split("_")[-1])
-            channel_id = str(interaction.channel.id)
+    async def _on_qty_remove(self, interaction: discord.Interaction, arg):
+        await self._change_qty(interaction, arg, is_add=False)
 
-            if channel_id not in self.bot.active_tickets:
-                await interaction.followup.send("❌ Tiket tidak ditemukan!", ephemeral=True)
-                return
+    async def _change_qty(self, interaction: discord.Interaction, arg, is_add):
+        try:
+            await interaction.response.defer()
+        except Exception:
+            return
 
-            ticket = self.bot.active_tickets[channel_id]
+        item_id = int(arg)
+        user_id = str(interaction.user.id)
+        channel_id = str(interaction.channel.id)
 
-            if user_id != ticket["user_id"]:
-                staff_role = discord.utils.get(interaction.guild.roles, name=STAFF_ROLE_NAME)
-                if staff_role not in interaction.user.roles:
-                    await interaction.followup.send("❌ Bukan tiket kamu!", ephemeral=True)
-                    return
+        if channel_id not in self.bot.active_tickets:
+            await interaction.followup.send("❌ Tiket tidak ditemukan!", ephemeral=True)
+            return
 
-            item_entry = next((i for i in ticket["items"] if i["id"] == item_id), None)
-            if not item_entry:
-                await interaction.followup.send("❌ Item tidak ada di tiket!", ephemeral=True)
-                return
+        ticket = self.bot.active_tickets[channel_id]
 
-            if is_add:
-                item_entry["qty"] += 1
-                msg = f"➕ **{item_entry['name']}** qty jadi **{item_entry['qty']}**"
-            else:
-                if item_entry["qty"] <= 1:
-                    ticket["items"].remove(item_entry)
-                    msg = f"🗑️ **{item_entry['name']}** dihapus dari tiket"
-                else:
-                    item_entry["qty"] -= 1
-                    msg = f"➖ **{item_entry['name']}** qty jadi **{item_entry['qty']}**"
-
-            ticket["total_price"] = calculate_total(ticket["items"])
-            await self.bot.db.update_ticket_items(channel_id, ticket["items"])
-            await self.bot.db.update_ticket_total(channel_id, ticket["total_price"])
-
-            if not ticket["items"]:
-                await interaction.followup.send("🔄 Tiket kosong, menutup dalam 5 detik...")
-                await asyncio.sleep(5)
-                del self.bot.active_tickets[channel_id]
-                await self.bot.db.delete_ticket(channel_id)
-                await interaction.channel.delete()
+        if user_id != ticket["user_id"]:
+            staff_role = discord.utils.get(interaction.guild.roles, name=STAFF_ROLE_NAME)
+            if staff_role not in interaction.user.roles:
+                await interaction.followup.send("❌ Bukan tiket kamu!", ephemeral=True)
                 return
 
-            new_content = f"{msg}\n🛒 **Items:**\n{format_items(ticket['items'])}\n💰 **Total: Rp {ticket['total_price']:,}**"
+        item_entry = next((i for i in ticket["items"] if i["id"] == item_id), None)
+        if not item_entry:
+            await interaction.followup.send("❌ Item tidak ada di tiket!", ephemeral=True)
+            return
 
-            qty_msg_id = ticket.get("qty_msg_id")
-            if qty_msg_id:
-                try:
-                    old_msg = await interaction.channel.fetch_message(qty_msg_id)
-                    await old_msg.edit(content=new_content)
-                except Exception:
-                    pass
+        if is_add:
+            item_entry["qty"] += 1
+            msg = f"➕ **{item_entry['name']}** qty jadi **{item_entry['qty']}**"
+        else:
+            if item_entry["qty"] <= 1:
+                ticket["items"].remove(item_entry)
+                msg = f"🗑️ **{item_entry['name']}** dihapus dari tiket"
             else:
-                sent = await interaction.followup.send(new_content)
-                ticket["qty_msg_id"] = sent.id
+                item_entry["qty"] -= 1
+                msg = f"➖ **{item_entry['name']}** qty jadi **{item_entry['qty']}**"
 
-        # ─── Confirm Payment ─────────────────────────────────────
+        ticket["total_price"] = calculate_total(ticket["items"])
+
+        if not ticket["items"]:
+            self._qty_pending.pop(channel_id, None)
+            await interaction.followup.send("🔄 Tiket kosong, menutup dalam 5 detik...")
+            await asyncio.sleep(5)
+            await self.bot.active_tickets.remove(channel_id)
+            await interaction.channel.delete()
+            return
 
-        elif custom_id == "confirm_payment":
+        # Write-behind: DB disimpan sekali setelah klik beruntun reda, pesan diedit sekali per jendela
+        self.bot.active_tickets.touch(channel_id)
+        new_content = f"{msg}\n🛒 **Items:**\n{format_items(ticket['items'])}\n💰 **Total: Rp {ticket['total_price']:,}**"
+        pending = self._qty_pending.get(channel_id)
+        if pending is not None:
+            pending["content"] = new_content
+            return
+        self._qty_pending[channel_id] = {"content": new_content}
+        asyncio.create_task(self._qty_message_loop(interaction.channel, ticket))
+
+    async def _qty_message_loop(self, channel, ticket):
+        channel_id = str(channel.id)
+        try:
+            while True:
+                content = self._qty_pending.get(channel_id, {}).pop("content", None)
+                if content is None:
+                    break
+                await self._show_qty_message(channel, ticket, content)
+                await asyncio.sleep(QTY_EDIT_WINDOW)
+        finally:
+            self._qty_pending.pop(channel_id, None)
+
+    async def _show_qty_message(self, channel, ticket, content):
+        # Edit langsung lewat PartialMessage dari id yang tersimpan — tanpa fetch_message dulu
+        qty_msg_id = ticket.get("qty_msg_id")
+        if qty_msg_id:
             try:
-                await interaction.response.defer()
-            except Exception:
+                await channel.get_partial_message(qty_msg_id).edit(content=content)
                 return
-            channel_id = str(interaction.channel.id)
-            if channel_id not in self.bot.active_tickets:
-                await interaction.followup.send("❌ Tiket tidak ditemukan!", ephemeral=True)
+            except discord.NotFound:
+                pass
+            except Exception:
                 return
+        try:
+            sent = await channel.send(content)
+        except Exception:
+            return
+        await self.bot.active_tickets.set_message_id(str(channel.id), "qty_msg_id", sent.id)
 
-            ticket = self.bot.active_tickets[channel_id]
-            if user_id != ticket["user_id"]:
-                await interaction.followup.send("❌ Bukan tiket kamu!", ephemeral=True)
-                return
-            if ticket["status"] != "OPEN":
-                await interaction.followup.send("❌ Tiket sudah diproses.", ephemeral=True)
-                return
+    # ─── Confirm Payment ─────────────────────────────────────
 
-            await interaction.followup.send(
-                "✅ **Pembayaran kamu sedang diverifikasi oleh admin.**\n"
-                "⏳ Estimasi: 1-5 menit. Mohon tunggu sebentar."
-            )
+    async def _confirm_payment(self, interaction: discord.Interaction):
+        try:
+            await interaction.response.defer()
+        except Exception:
+            return
+        user_id = str(interaction.user.id)
+        channel_id = str(interaction.channel.id)
+        if channel_id not in self.bot.active_tickets:
+            await interaction.followup.send("❌ Tiket tidak ditemukan!", ephemeral=True)
+            return
 
-            staff_role = discord.utils.get(interaction.guild.roles, name=STAFF_ROLE_NAME)
-            verify_view = discord.ui.View()
-            verify_btn = discord.ui.Button(
-                label="✅ Verifikasi Pembayaran",
-                style=discord.ButtonStyle.success,
-                custom_id="verify_payment",
+        ticket = self.bot.active_tickets[channel_id]
+        if user_id != ticket["user_id"]:
+            await interaction.followup.send("❌ Bukan tiket kamu!", ephemeral=True)
+            return
+        if ticket["status"] != "OPEN":
+            await interaction.followup.send("❌ Tiket sudah diproses.", ephemeral=True)
+            return
+
+        await interaction.followup.send(
+            "✅ **Pembayaran kamu sedang diverifikasi oleh admin.**\n"
+            "⏳ Estimasi: 1-5 menit. Mohon tunggu sebentar."
+        )
+
+        staff_role = discord.utils.get(interaction.guild.roles, name=STAFF_ROLE_NAME)
+        verify_view = VerifyPaymentView(self)
+        if staff_role:
+            await interaction.channel.send(
+                f"{staff_role.mention} **{interaction.user.display_name}** mengklaim sudah bayar!\n"
+                f"💰 Total: **Rp {ticket['total_price']:,}** | Metode: **{ticket.get('payment_method', '-')}**",
+                view=verify_view,
             )
-            verify_view.add_item(verify_btn)
-            if staff_role:
-                await interaction.channel.send(
-                    f"{staff_role.mention} **{interaction.user.display_name}** mengklaim sudah bayar!\n"
-                    f"💰 Total: **Rp {ticket['total_price']:,}** | Metode: **{ticket.get('payment_method', '-')}**",
-                    view=verify_view,
-                )
 
-        # ─── Verify Payment ───────────────────────────────────────
+    # ─── Verify Payment ───────────────────────────────────────
 
-        elif custom_id == "verify_payment":
-            try:
-                await interaction.response.defer()
-            except Exception:
-                return
-            channel_id = str(interaction.channel.id)
-            if channel_id not in self.bot.active_tickets:
-                await interaction.followup.send("❌ Tiket tidak ditemukan!", ephemeral=True)
-                return
+    async def _verify_payment(self, interaction: discord.Interaction):
+        try:
+            await interaction.response.defer()
+        except Exception:
+            return
+        channel_id = str(interaction.channel.id)
+        if channel_id not in self.bot.active_tickets:
+            await interaction.followup.send("❌ Tiket tidak ditemukan!", ephemeral=True)
+            return
 
-            staff_role = discord.utils.get(interaction.guild.roles, name=STAFF_ROLE_NAME)
-            if staff_role not in interaction.user.roles:
-                await interaction.followup.send("❌ Admin only!", ephemeral=True)
-                return
+        staff_role = discord.utils.get(interaction.guild.roles, name=STAFF_ROLE_NAME)
+        if staff_role not in interaction.user.roles:
+            await interaction.followup.send("❌ Admin only!", ephemeral=True)
+            return
 
-            ticket = self.bot.active_tickets[channel_id]
-            if ticket["status"] != "OPEN":
-                await interaction.followup.send("❌ Tiket sudah diproses.", ephemeral=True)
-                return
+        ticket = self.bot.active_tickets[channel_id]
+        if ticket["status"] != "OPEN":
+            await interaction.followup.send("❌ Tiket sudah diproses.", ephemeral=True)
+            return
 
-            ticket["status"] = "PAID"
+        await self.bot.active_tickets.set_status(channel_id, "PAID", ticket.get("payment_method"))
 
-            await interaction.channel.send(
-                f"✅ **Pembayaran dikonfirmasi!**\n"
-                f"Lanjutkan proses serah terima item. Ketik `!done` setelah semua selesai."
-            )
+        await interaction.channel.send(
+            f"✅ **Pembayaran dikonfirmasi!**\n"
+            f"Lanjutkan proses serah terima item. Ketik `!done` setelah semua selesai."
+        )
 
-            await self.bot.db.update_ticket_status(channel_id, "PAID", ticket.get("payment_method"))
+    # ─── Ticket Reminder ──────────────────────────────────────
+
+    @commands.Cog.listener()
+    async def on_tickets_loaded(self):
+        for channel_id in list(self.bot.active_tickets):
+            self._schedule_reminder(channel_id)
+
+    def _schedule_reminder(self, channel_id):
+        """Satu job scheduler per tiket, jatuh tempo tepat saat reminder berikutnya"""
+        ticket = self.bot.active_tickets.get(channel_id)
+        if ticket is None or ticket.get("status") != "OPEN":
+            return
+        self.bot.scheduler.once(
+            f"ticket_reminder_{channel_id}",
+            datetime.fromtimestamp(_reminder_due(ticket)),
+            lambda: self._remind(channel_id),
+        )
+
+    async def _remind(self, channel_id):
+        ticket = self.bot.active_tickets.get(channel_id)
+        if ticket is None or ticket.get("status") != "OPEN":
+            return
+        now = int(time.time())
+        if _reminder_due(ticket) > now:
+            # Ada aktivitas sejak job dijadwalkan → cukup geser jadwalnya
+            self._schedule_reminder(channel_id)
+            return
+        channel = self.bot.get_channel(int(channel_id))
+        if not channel:
+            return
+        # Dicatat dulu supaya kalau kirim gagal, percobaan berikutnya tetap sejam lagi (bukan langsung)
+        ticket["reminded_at"] = now
+        self._schedule_reminder(channel_id)
+
+        guild = channel.guild
+        idle_hours = (now - _last_activity(ticket)) / 3600
+        user = guild.get_member(int(ticket["user_id"]))
+        staff_role = discord.utils.get(guild.roles, name=STAFF_ROLE_NAME)
+        embed = discord.Embed(
+            title="PENGINGAT TIKET",
+            description=(
+                f"Tiket ini tidak ada aktivitas selama **{int(idle_hours)} jam**.\n\n"
+                f"Jika transaksi sudah selesai, Admin Store harap segera ketik `!done`.\n"
+                f"Jika transaksi dibatalkan, ketik `!cancel`.\n\n"
+                f"⚠️ Perhatian: Jika bot mengalami update atau restart, tiket yang "
+                f"menggantung terlalu lama berisiko tidak dapat dilanjutkan.\n"
+                f"Segera selesaikan tiket ini!"
+            ),
+            color=0xFFA500
+        )
+        embed.set_footer(text=STORE_NAME)
+        mentions = user.mention if user else ""
+        if staff_role:
+            mentions += f" {staff_role.mention}"
+
+        # Hapus reminder lama sebelum kirim baru (id tersimpan di DB, tanpa fetch_message)
+        old_reminder_id = ticket.get("reminder_message_id")
+        if old_reminder_id:
+            try:
+                await channel.get_partial_message(int(old_reminder_id)).delete()
+            except Exception:
+                pass
+
+        new_reminder = await channel.send(content=mentions, embed=embed)
+        await self.bot.active_tickets.set_reminder(channel_id, new_reminder.id, now)
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -353,6 +536,9 @@ class TicketCog(commands.Cog):
 
         channel_id = str(message.channel.id)
         is_ticket = message.channel.name and message.channel.name.startswith("ticket-")
+        if is_ticket and channel_id in self.bot.active_tickets:
+            # Ada aktivitas → reminder mundur (dicek ulang saat job reminder jatuh tempo)
+            self.bot.active_tickets.touch(channel_id)
 
         # ─── Cancel Command ──────────────────────────────────────
 
@@ -363,8 +549,7 @@ class TicketCog(commands.Cog):
                 if staff_role in message.author.roles:
                     await message.channel.send("Transaksi dibatalkan. Ticket closed.")
                     await asyncio.sleep(3)
-                    self.bot.active_tickets.pop(channel_id, None)
-                    await self.bot.db.delete_ticket(channel_id)
+                    await self.bot.active_tickets.remove(channel_id)
                     await message.channel.delete()
                     return
 
@@ -416,8 +601,7 @@ class TicketCog(commands.Cog):
                 )
 
             await message.channel.send("✅ Tiket ditutup. Terima kasih! Channel akan dihapus dalam 5 detik...")
-            self.bot.active_tickets.pop(channel_id, None)
-            await self.bot.db.update_ticket_status(channel_id, "CLOSED", None)
+            await self.bot.active_tickets.close(channel_id)
             await asyncio.sleep(5)
             await message.channel.delete()
             return
@@ -429,27 +613,15 @@ class TicketCog(commands.Cog):
             if ticket["status"] == "OPEN" and message.content.strip() in ["1", "2", "3"]:
                 methods = ["QRIS", "DANA", "BCA"]
                 method = methods[int(message.content) - 1]
-                ticket["payment_method"] = method
                 total = ticket["total_price"]
-                await self.bot.db.update_ticket_status(channel_id, "OPEN", method)
+                await self.bot.active_tickets.set_status(channel_id, "OPEN", method)
 
                 items_text = format_items(ticket["items"])
-                paid_view = discord.ui.View()
-                paid_view.add_item(discord.ui.Button(
-                    label="PAID", style=discord.ButtonStyle.success, custom_id="confirm_payment"
-                ))
+                paid_view = ConfirmPaymentView(self)
                 staff_role = discord.utils.get(message.guild.roles, name=STAFF_ROLE_NAME)
 
                 if method == "QRIS":
-                    qris_url = None
-                    try:
-                        async with aiosqlite.connect(self.bot.db.db_name) as db:
-                            cursor = await db.execute("SELECT value FROM settings WHERE key = 'qris_url'")
-                            row = await cursor.fetchone()
-                            if row:
-                                qris_url = row[0]
-                    except Exception:
-                        pass
+                    qris_url = await self.bot.db.get_setting("qris_url")
                     embed = discord.Embed(
                         title="QRIS PAYMENT",
                         description=(
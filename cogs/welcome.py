@@ -20,15 +20,11 @@ class WelcomeCog(commands.Cog):
         self._has_gif = os.path.exists(WELCOME_GIF_PATH)
         self._has_boost_gif = os.path.exists(BOOST_GIF_PATH)
 
-    async def cog_load(self):
-        self.bot.loop.create_task(self._load_settings())
-
-    async def _load_settings(self):
-        await self.bot.wait_until_ready()
+    @commands.Cog.listener()
+    async def on_state_reloaded(self):
+        # Setelah init_db (cache settings sudah terisi) — saat start dan setelah restore database
         try:
-            ch_id = await self.bot.db.get_setting("welcome_channel_id")
-            if ch_id:
-                self._welcome_channel_id = int(ch_id)
+            self._welcome_channel_id = await self.bot.db.get_setting("welcome_channel_id", cast=int)
             self._has_gif = os.path.exists(WELCOME_GIF_PATH)
             self._has_boost_gif = os.path.exists(BOOST_GIF_PATH)
         except Exception as e:
@@ -1,19 +1,214 @@
+import os
 import json
+import time
+import sqlite3
+import asyncio
 import aiosqlite
-from datetime import datetime
+from collections.abc import MutableMapping
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
 from config import DB_NAME
+from catalog import Catalog
+
+# Jeda write-behind isi keranjang tiket (klik +/- beruntun digabung jadi satu UPDATE)
+TICKET_FLUSH_DELAY = 2
+# Batas tunggu reader kembali saat ConnectionPool.swap sebelum write lock dilepas & dicoba lagi
+SWAP_DRAIN_TIMEOUT = 0.5
+
+
+def _epoch(dt):
+    return int(dt.timestamp())
+
+
+class ConnectionPool:
+    """Satu koneksi writer + beberapa koneksi reader yang dibuka sekali dan dipakai ulang"""
+
+    def __init__(self, db_name, readers=3):
+        self.db_name = db_name
+        self.size = readers
+        self._writer = None
+        self._write_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+        self._readers = []
+        self._idle = None
+
+    @property
+    def is_open(self):
+        return self._writer is not None
+
+    async def _connect(self):
+        conn = await aiosqlite.connect(self.db_name)
+        conn.row_factory = aiosqlite.Row
+        await conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    async def open(self):
+        async with self._open_lock:
+            if self.is_open:
+                return
+            self._idle = asyncio.Queue()
+            await self._open_connections()
+
+    async def _open_connections(self):
+        writer = await self._connect()
+        # WAL mode supaya reader tidak ke-block writer (dan sebaliknya)
+        await writer.execute("PRAGMA journal_mode=WAL")
+        await writer.execute("PRAGMA synchronous=NORMAL")
+        self._readers = []
+        for _ in range(self.size):
+            conn = await self._connect()
+            self._readers.append(conn)
+            self._idle.put_nowait(conn)
+        self._writer = writer
+
+    async def close(self):
+        """Tutup semua koneksi setelah write & read yang sedang jalan selesai"""
+        async with self._open_lock:
+            if not self.is_open:
+                return
+
+            async def shutdown():
+                await self._close_connections()
+                # Read yang masih menunggu di antrian lama dibangunkan (None) lalu membuka pool lagi
+                idle, self._idle = self._idle, None
+                idle.put_nowait(None)
+
+            await self._quiesce(shutdown)
+
+    async def swap(self, install):
+        """Tutup semua koneksi, jalankan `await install()` (mis. ganti file database), lalu buka lagi.
+
+        Write & read yang sedang jalan ditunggu selesai dulu; yang datang selama
+        swap menunggu (write di lock, read di antrian reader) lalu lanjut dengan
+        koneksi baru — pemanggil tidak melihat error. Kalau install gagal, pool
+        dibuka lagi ke file lama.
+        """
+        async with self._open_lock:
+            if not self.is_open:
+                await install()
+                return
+
+            async def reinstall():
+                await self._close_connections()
+                try:
+                    await install()
+                finally:
+                    await self._open_connections()
+
+            await self._quiesce(reinstall)
+
+    async def _quiesce(self, action):
+        """Jalankan action() saat write lock dipegang dan semua reader ada di tangan pool"""
+        while True:
+            async with self._write_lock:
+                # Ambil semua reader dari antrian = tunggu sampai tidak ada read yang jalan.
+                # Pemegang reader yang sedang menunggu write lock tidak boleh ditunggu selamanya:
+                # kalau lewat batas, reader dikembalikan dan lock dilepas dulu, lalu coba lagi
+                drained = []
+                try:
+                    async with asyncio.timeout(SWAP_DRAIN_TIMEOUT):
+                        while len(drained) < len(self._readers):
+                            drained.append(await self._idle.get())
+                except TimeoutError:
+                    for conn in drained:
+                        self._idle.put_nowait(conn)
+                else:
+                    await action()
+                    return
+            await asyncio.sleep(0)
+
+    async def _close_connections(self):
+        for conn in self._readers:
+            await conn.close()
+        self._readers = []
+        await self._writer.close()
+        self._writer = None
+
+    @asynccontextmanager
+    async def write(self):
+        """Koneksi writer eksklusif; commit kalau blok sukses, rollback kalau error"""
+        while True:
+            if not self.is_open:
+                await self.open()
+            await self._write_lock.acquire()
+            if self._writer is not None:
+                break
+            # Pool ditutup selagi menunggu lock → buka lagi lalu antre ulang
+            self._write_lock.release()
+        try:
+            db = self._writer
+            try:
+                yield db
+                await db.commit()
+            except BaseException:
+                await db.rollback()
+                raise
+        finally:
+            self._write_lock.release()
+
+    @asynccontextmanager
+    async def read(self):
+        while True:
+            if not self.is_open:
+                await self.open()
+            idle = self._idle
+            conn = await idle.get()
+            if conn is not None:
+                break
+            # Pool ditutup selagi menunggu: teruskan tanda ke penunggu berikutnya, lalu buka lagi
+            idle.put_nowait(None)
+        try:
+            yield conn
+        finally:
+            idle.put_nowait(conn)
 
 
 class SimpleDB:
 
     def __init__(self, db_name=DB_NAME):
         self.db_name = db_name
+        self.pool = ConnectionPool(db_name)
+        # Naik setiap tabel products berubah (atau database diganti); dipakai ProductsCache
+        self.catalog_version = 0
+        # Cache tabel settings (key: value string); dimuat di init_db, di-update saat set_setting
+        self.settings = {}
+
+    async def close(self):
+        await self.pool.close()
+
+    async def replace_database(self, path, old_path=None):
+        """Ganti file database dengan `path` (file .db siap pakai) tanpa restart; return lama jeda (ms).
+        old_path: file database lama dipindah ke sini (diambil saat semua writer berhenti, tanpa copy)"""
+        def install():
+            if old_path and os.path.exists(self.db_name):
+                # Isi -wal dilebur ke file utama dulu supaya file lama utuh tanpa -wal
+                conn = sqlite3.connect(self.db_name)
+                try:
+                    conn.execute("PRAGMA journal_mode=DELETE")
+                finally:
+                    conn.close()
+                os.replace(self.db_name, old_path)
+            # -wal / -shm milik file lama tidak boleh ikut terbaca oleh file baru
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists(self.db_name + suffix):
+                    os.remove(self.db_name + suffix)
+            try:
+                os.replace(path, self.db_name)
+            except Exception:
+                if old_path and os.path.exists(old_path):
+                    os.replace(old_path, self.db_name)
+                raise
+
+        start = time.perf_counter()
+        await self.pool.swap(lambda: asyncio.to_thread(install))
+        # Migrasi kolom (backup lama) + muat ulang cache settings & versi catalog
+        await self.init_db()
+        return (time.perf_counter() - start) * 1000
 
     async def init_db(self):
-        async with aiosqlite.connect(self.db_name) as db:
-            # WAL mode untuk mencegah database locked error saat concurrent access
-            await db.execute("PRAGMA journal_mode=WAL")
-            await db.execute("PRAGMA synchronous=NORMAL")
+        await self.pool.open()
+        self.catalog_version += 1
+        async with self.pool.write() as db:
             await db.execute('''CREATE TABLE IF NOT EXISTS transactions (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 invoice TEXT,
@@ -21,7 +216,8 @@ class SimpleDB:
                 items TEXT,
                 total_price INTEGER,
                 payment_method TEXT,
-                timestamp TEXT
+                timestamp TEXT,
+                ts_epoch INTEGER
             )''')
             await db.execute('''CREATE TABLE IF NOT EXISTS products (
                 id INTEGER PRIMARY KEY,
@@ -71,33 +267,210 @@ class SimpleDB:
                 await db.execute("ALTER TABLE giveaways ADD COLUMN ended INTEGER DEFAULT 0")
             except Exception:
                 pass
+            await db.execute('''CREATE TABLE IF NOT EXISTS catalog_pins (
+                channel_id TEXT PRIMARY KEY,
+                guild_id TEXT,
+                message_ids TEXT,
+                content_hash TEXT
+            )''')
+            await db.execute('''CREATE TABLE IF NOT EXISTS scheduled_jobs (
+                name TEXT PRIMARY KEY,
+                next_run REAL,
+                last_run REAL,
+                last_duration_ms REAL,
+                runs INTEGER DEFAULT 0,
+                failures INTEGER DEFAULT 0,
+                last_error TEXT
+            )''')
+            await db.execute('''CREATE TABLE IF NOT EXISTS user_names (
+                user_id TEXT PRIMARY KEY,
+                name TEXT,
+                updated_at INTEGER
+            )''')
             # Migrations
             try:
                 await db.execute("ALTER TABLE products ADD COLUMN spotlight INTEGER DEFAULT 0")
             except Exception:
                 pass
-            await db.commit()
+            try:
+                await db.execute("ALTER TABLE transactions ADD COLUMN ts_epoch INTEGER")
+            except Exception:
+                pass
+            for column, col_type in (
+                ("qty_msg_id", "TEXT"),
+                ("reminder_message_id", "TEXT"),
+                ("last_activity", "INTEGER"),
+                ("reminded_at", "INTEGER"),
+            ):
+                try:
+                    await db.execute(f"ALTER TABLE active_tickets ADD COLUMN {column} {col_type}")
+                except Exception:
+                    pass
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_transactions_user ON transactions (user_id, ts_epoch)")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_transactions_ts ON transactions (ts_epoch)")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_transactions_invoice ON transactions (invoice)")
+            await self._backfill_ts_epoch(db)
+            await db.execute('''CREATE TABLE IF NOT EXISTS daily_sales (
+                date TEXT,
+                payment_method TEXT,
+                count INTEGER DEFAULT 0,
+                revenue INTEGER DEFAULT 0,
+                buyers INTEGER DEFAULT 0,
+                PRIMARY KEY (date, payment_method)
+            )''')
+            await db.execute('''CREATE TABLE IF NOT EXISTS transaction_items (
+                transaction_id INTEGER,
+                product_id INTEGER,
+                name TEXT,
+                price INTEGER,
+                qty INTEGER
+            )''')
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_transaction_items_tx ON transaction_items (transaction_id)")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_transaction_items_product ON transaction_items (product_id)")
+            await self._backfill_transaction_items(db)
+            await db.execute('''CREATE TABLE IF NOT EXISTS invoice_sequence (
+                date TEXT PRIMARY KEY,
+                counter INTEGER DEFAULT 0
+            )''')
+            # Migrasi counter lama (settings.invoice_counter) supaya nomor hari ini tidak mulai dari 1 lagi
+            cursor = await db.execute("SELECT value FROM settings WHERE key = 'invoice_counter'")
+            row = await cursor.fetchone()
+            if row:
+                try:
+                    data = json.loads(row[0])
+                    await db.execute(
+                        "INSERT OR IGNORE INTO invoice_sequence (date, counter) VALUES (?, ?)",
+                        (data["date"], int(data["counter"])),
+                    )
+                except Exception:
+                    pass
+            # Rollup baru dibuat di database lama → isi sekali dari histori
+            cursor = await db.execute(
+                "SELECT EXISTS(SELECT 1 FROM transactions), EXISTS(SELECT 1 FROM daily_sales)"
+            )
+            has_trans, has_rollup = await cursor.fetchone()
+            if has_trans and not has_rollup:
+                await self._rebuild_daily_sales(db)
+            cursor = await db.execute("SELECT key, value FROM settings")
+            self.settings = {key: value for key, value in await cursor.fetchall()}
         print("✓ Database siap")
 
+    async def _backfill_ts_epoch(self, db, batch_size=5000):
+        """Isi ts_epoch untuk transaksi lama (sebelum kolom ini ada) dari string ISO"""
+        filled = 0
+        while True:
+            cursor = await db.execute(
+                "SELECT id, timestamp FROM transactions WHERE ts_epoch IS NULL LIMIT ?",
+                (batch_size,),
+            )
+            rows = await cursor.fetchall()
+            if not rows:
+                break
+            updates = []
+            for row in rows:
+                try:
+                    epoch = _epoch(datetime.fromisoformat(row["timestamp"]))
+                except Exception:
+                    epoch = 0
+                updates.append((epoch, row["id"]))
+            await db.executemany("UPDATE transactions SET ts_epoch = ? WHERE id = ?", updates)
+            filled += len(updates)
+        if filled:
+            print(f"✓ Backfill ts_epoch: {filled} transaksi")
+
+    async def _backfill_transaction_items(self, db, batch_size=5000):
+        """Pecah JSON items transaksi lama ke transaction_items (lanjut dari id terakhir)"""
+        # Watermark di settings: transaksi tanpa item di ujung tabel tidak di-scan ulang tiap init_db
+        cursor = await db.execute(
+            "SELECT MAX(COALESCE((SELECT MAX(transaction_id) FROM transaction_items), 0), "
+            "COALESCE((SELECT CAST(value AS INTEGER) FROM settings WHERE key = 'transaction_items_backfill_id'), 0))"
+        )
+        last_id = (await cursor.fetchone())[0]
+        filled = 0
+        while True:
+            cursor = await db.execute(
+                "SELECT id, items FROM transactions WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size),
+            )
+            rows = await cursor.fetchall()
+            if not rows:
+                break
+            item_rows = []
+            for row in rows:
+                try:
+                    items = json.loads(row["items"] or "[]")
+                except Exception:
+                    items = []
+                item_rows.extend(self._item_rows(row["id"], items))
+            await db.executemany(
+                "INSERT INTO transaction_items (transaction_id, product_id, name, price, qty) VALUES (?, ?, ?, ?, ?)",
+                item_rows,
+            )
+            last_id = rows[-1]["id"]
+            filled += len(rows)
+        if filled:
+            await db.execute(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES ('transaction_items_backfill_id', ?)",
+                (str(last_id),),
+            )
+            print(f"✓ Backfill transaction_items: {filled} transaksi")
+
+    @staticmethod
+    def _item_rows(transaction_id, items):
+        return [
+            (transaction_id, item.get("id"), item.get("name"), item.get("price", 0), item.get("qty", 1))
+            for item in items
+        ]
+
     # ─── Transactions ────────────────────────────────────────────
 
     async def save_transaction(self, trans_data):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
-                await db.execute(
+            now = datetime.now()
+            day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            method = trans_data.get("payment_method") or "-"
+            async with self.pool.write() as db:
+                # Buyer baru untuk (hari, metode) ini? Dicek sebelum insert, lewat index user_id
+                cursor = await db.execute(
+                    '''SELECT 1 FROM transactions
+                       WHERE user_id = ? AND ts_epoch >= ? AND ts_epoch < ?
+                         AND COALESCE(NULLIF(payment_method, ''), '-') = ?
+                       LIMIT 1''',
+                    (
+                        trans_data["user_id"],
+                        _epoch(day_start),
+                        _epoch(day_start + timedelta(days=1)),
+                        method,
+                    ),
+                )
+                new_buyer = 0 if await cursor.fetchone() else 1
+                cursor = await db.execute(
                     '''INSERT INTO transactions
-                       (invoice, user_id, items, total_price, payment_method, timestamp)
-                       VALUES (?, ?, ?, ?, ?, ?)''',
+                       (invoice, user_id, items, total_price, payment_method, timestamp, ts_epoch)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)''',
                     (
                         trans_data["invoice"],
                         trans_data["user_id"],
                         json.dumps(trans_data["items"]),
                         trans_data["total_price"],
                         trans_data.get("payment_method", ""),
-                        datetime.now().isoformat(),
+                        now.isoformat(),
+                        _epoch(now),
                     ),
                 )
-                await db.commit()
+                await db.executemany(
+                    "INSERT INTO transaction_items (transaction_id, product_id, name, price, qty) VALUES (?, ?, ?, ?, ?)",
+                    self._item_rows(cursor.lastrowid, trans_data["items"]),
+                )
+                await db.execute(
+                    '''INSERT INTO daily_sales (date, payment_method, count, revenue, buyers)
+                       VALUES (?, ?, 1, ?, ?)
+                       ON CONFLICT (date, payment_method) DO UPDATE SET
+                           count = count + 1,
+                           revenue = revenue + excluded.revenue,
+                           buyers = buyers + excluded.buyers''',
+                    (now.strftime("%Y-%m-%d"), method, trans_data["total_price"], new_buyer),
+                )
             return True
         except Exception as e:
             print(f"❌ Error simpan transaksi: {e}")
@@ -105,12 +478,11 @@ class SimpleDB:
 
     async def get_user_transactions(self, user_id, limit=5):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
-                db.row_factory = aiosqlite.Row
+            async with self.pool.read() as db:
                 cursor = await db.execute(
                     '''SELECT * FROM transactions
                        WHERE user_id = ?
-                       ORDER BY timestamp DESC
+                       ORDER BY ts_epoch DESC
                        LIMIT ?''',
                     (user_id, limit),
                 )
@@ -122,10 +494,9 @@ class SimpleDB:
 
     async def get_all_transactions(self):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
-                db.row_factory = aiosqlite.Row
+            async with self.pool.read() as db:
                 cursor = await db.execute(
-                    "SELECT * FROM transactions ORDER BY timestamp DESC"
+                    "SELECT * FROM transactions ORDER BY ts_epoch DESC"
                 )
                 rows = await cursor.fetchall()
             return [self._parse_transaction(row) for row in rows]
@@ -133,6 +504,234 @@ class SimpleDB:
             print(f"❌ Error ambil semua transaksi: {e}")
             return []
 
+    async def get_user_summary(self, user_id):
+        """Jumlah transaksi dan total belanja user (pakai index user_id)"""
+        try:
+            async with self.pool.read() as db:
+                cursor = await db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(total_price), 0) FROM transactions WHERE user_id = ?",
+                    (user_id,),
+                )
+                row = await cursor.fetchone()
+            return {"count": row[0], "total": row[1]}
+        except Exception as e:
+            print(f"❌ Error ambil ringkasan user: {e}")
+            return {"count": 0, "total": 0}
+
+    async def iter_transactions(self, filters=None, batch_size=500):
+        """Async generator transaksi terbaru dulu, dibaca per batch (keyset ts_epoch, id).
+
+        filters: dict opsional dengan user_id, start, end (start <= timestamp < end).
+        Memori tetap kecil berapa pun besar histori. Koneksi reader hanya dipegang
+        selama satu batch dibaca — tidak selama pemanggil memproses baris — jadi
+        pemanggil boleh menulis ke DB di tengah iterasi.
+        """
+        filters = filters or {}
+        where, params = [], []
+        if filters.get("user_id") is not None:
+            where.append("user_id = ?")
+            params.append(str(filters["user_id"]))
+        if filters.get("start") is not None:
+            where.append("ts_epoch >= ?")
+            params.append(_epoch(filters["start"]))
+        if filters.get("end") is not None:
+            where.append("ts_epoch < ?")
+            params.append(_epoch(filters["end"]))
+        after = None
+        while True:
+            page_where, page_params = list(where), list(params)
+            if after is not None:
+                page_where.append("(ts_epoch, id) < (?, ?)")
+                page_params.extend(after)
+            where_sql = f"WHERE {' AND '.join(page_where)}" if page_where else ""
+            # Error tidak ditelan: pemanggil (mis. /export) jangan sampai mengira datanya lengkap
+            async with self.pool.read() as db:
+                cursor = await db.execute(
+                    f"SELECT * FROM transactions {where_sql} ORDER BY ts_epoch DESC, id DESC LIMIT ?",
+                    (*page_params, batch_size),
+                )
+                rows = await cursor.fetchall()
+            if not rows:
+                return
+            after = (rows[-1]["ts_epoch"], rows[-1]["id"])
+            for row in rows:
+                yield self._parse_transaction(row)
+
+    _SALES_GROUPS = {
+        "day": "date(ts_epoch, 'unixepoch', 'localtime')",
+        "payment_method": "COALESCE(NULLIF(payment_method, ''), '-')",
+        "user": "user_id",
+    }
+
+    async def aggregate_sales(self, start=None, end=None, group_by=None):
+        """Hitung count/omset/buyer unik langsung di SQL untuk start <= timestamp < end.
+
+        group_by=None mengembalikan satu dict total; "day", "payment_method" atau
+        "user" mengembalikan list dict per grup (key = tanggal / metode / user_id).
+        """
+        where, params = [], []
+        if start is not None:
+            where.append("ts_epoch >= ?")
+            params.append(_epoch(start))
+        if end is not None:
+            where.append("ts_epoch < ?")
+            params.append(_epoch(end))
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+        if group_by is None:
+            key_sql, group_sql = "NULL", ""
+        else:
+            key_sql = self._SALES_GROUPS[group_by]
+            order = "key" if group_by == "day" else "revenue DESC"
+            group_sql = f"GROUP BY key ORDER BY {order}"
+        try:
+            async with self.pool.read() as db:
+                cursor = await db.execute(
+                    f'''SELECT {key_sql} AS key,
+                              COUNT(*) AS count,
+                              COALESCE(SUM(total_price), 0) AS revenue,
+                              COUNT(DISTINCT user_id) AS buyers,
+                              MIN(ts_epoch) AS first_epoch
+                       FROM transactions {where_sql} {group_sql}''',
+                    params,
+                )
+                rows = await cursor.fetchall()
+        except Exception as e:
+            print(f"❌ Error agregasi penjualan: {e}")
+            rows = []
+        result = [
+            {
+                "key": row["key"],
+                "count": row["count"],
+                "revenue": row["revenue"],
+                "buyers": row["buyers"],
+                "first": datetime.fromtimestamp(row["first_epoch"]) if row["first_epoch"] else None,
+            }
+            for row in rows
+        ]
+        if group_by is None:
+            return result[0] if result else {"key": None, "count": 0, "revenue": 0, "buyers": 0, "first": None}
+        return result
+
+    async def top_products(self, start=None, end=None, by="revenue", limit=10):
+        """Ranking produk terjual untuk start <= timestamp < end, urut "revenue" atau "qty" """
+        where, params = [], []
+        if start is not None:
+            where.append("t.ts_epoch >= ?")
+            params.append(_epoch(start))
+        if end is not None:
+            where.append("t.ts_epoch < ?")
+            params.append(_epoch(end))
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+        # Dengan rentang waktu, CROSS JOIN memaksa transactions jadi loop luar:
+        # range scan di idx_transactions_ts lalu lookup item per transaksi
+        join = "transactions t CROSS JOIN transaction_items ti" if where else "transaction_items ti JOIN transactions t"
+        order = "qty DESC, revenue DESC" if by == "qty" else "revenue DESC, qty DESC"
+        try:
+            async with self.pool.read() as db:
+                cursor = await db.execute(
+                    f'''SELECT ti.product_id AS product_id,
+                              MAX(ti.name) AS name,
+                              SUM(ti.qty) AS qty,
+                              SUM(ti.price * ti.qty) AS revenue,
+                              COUNT(DISTINCT ti.transaction_id) AS orders
+                       FROM {join} ON t.id = ti.transaction_id
+                       {where_sql}
+                       GROUP BY ti.product_id
+                       ORDER BY {order}
+                       LIMIT ?''',
+                    (*params, limit),
+                )
+                rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
+        except Exception as e:
+            print(f"❌ Error ambil top produk: {e}")
+            return []
+
+    # ─── Daily Sales Rollup ──────────────────────────────────────
+
+    async def _rebuild_daily_sales(self, db):
+        await db.execute("DELETE FROM daily_sales")
+        await db.execute(
+            '''INSERT INTO daily_sales (date, payment_method, count, revenue, buyers)
+               SELECT date(ts_epoch, 'unixepoch', 'localtime'),
+                      COALESCE(NULLIF(payment_method, ''), '-'),
+                      COUNT(*), COALESCE(SUM(total_price), 0), COUNT(DISTINCT user_id)
+               FROM transactions
+               GROUP BY 1, 2'''
+        )
+        cursor = await db.execute("SELECT COUNT(*) FROM daily_sales")
+        rows = (await cursor.fetchone())[0]
+        print(f"✓ Rollup daily_sales dibangun ulang: {rows} baris")
+        return rows
+
+    async def rebuild_daily_sales(self):
+        try:
+            async with self.pool.write() as db:
+                return await self._rebuild_daily_sales(db)
+        except Exception as e:
+            print(f"❌ Error rebuild daily_sales: {e}")
+            return None
+
+    async def rollup_sales(self, start=None, end=None, group_by=None):
+        """Seperti aggregate_sales tapi dibaca dari tabel daily_sales (per hari).
+
+        start/end berupa date/datetime, dibandingkan per tanggal (start <= tanggal < end).
+        group_by: None, "day" atau "payment_method". "buyers" adalah jumlah buyer unik
+        per (hari, metode), jadi kalau dijumlah lintas hari bisa lebih besar dari buyer unik.
+        """
+        where, params = [], []
+        if start is not None:
+            where.append("date >= ?")
+            params.append(start.strftime("%Y-%m-%d"))
+        if end is not None:
+            where.append("date < ?")
+            params.append(end.strftime("%Y-%m-%d"))
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+        if group_by is None:
+            key_sql, group_sql = "NULL", ""
+        else:
+            key_sql = {"day": "date", "payment_method": "payment_method"}[group_by]
+            order = "key" if group_by == "day" else "revenue DESC"
+            group_sql = f"GROUP BY key ORDER BY {order}"
+        try:
+            async with self.pool.read() as db:
+                cursor = await db.execute(
+                    f'''SELECT {key_sql} AS key,
+                              COALESCE(SUM(count), 0) AS count,
+                              COALESCE(SUM(revenue), 0) AS revenue,
+                              COALESCE(SUM(buyers), 0) AS buyers,
+                              MIN(date) AS first_date
+                       FROM daily_sales {where_sql} {group_sql}''',
+                    params,
+                )
+                rows = await cursor.fetchall()
+        except Exception as e:
+            print(f"❌ Error baca daily_sales: {e}")
+            rows = []
+        result = [
+            {
+                "key": row["key"],
+                "count": row["count"],
+                "revenue": row["revenue"],
+                "buyers": row["buyers"],
+                "first": datetime.fromisoformat(row["first_date"]) if row["first_date"] else None,
+            }
+            for row in rows
+        ]
+        if group_by is None:
+            return result[0] if result else {"key": None, "count": 0, "revenue": 0, "buyers": 0, "first": None}
+        return result
+
+    async def count_buyers(self):
+        """Jumlah buyer unik sepanjang waktu (index-only scan di idx_transactions_user)"""
+        try:
+            async with self.pool.read() as db:
+                cursor = await db.execute("SELECT COUNT(DISTINCT user_id) FROM transactions")
+                return (await cursor.fetchone())[0]
+        except Exception as e:
+            print(f"❌ Error hitung buyer: {e}")
+            return 0
+
     def _parse_transaction(self, row):
         return {
             "invoice": row["invoice"],
@@ -145,16 +744,24 @@ class SimpleDB:
 
     # ─── Products ────────────────────────────────────────────────
 
+    _UPSERT_PRODUCT = '''INSERT INTO products (id, name, price, category, spotlight) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET
+            name = excluded.name, price = excluded.price, category = excluded.category'''
+
+    @staticmethod
+    def _product_row(p):
+        return (p["id"], p["name"], p["price"], p["category"], p.get("spotlight", 0))
+
     async def save_products(self, products):
+        """Ganti seluruh isi tabel products (seed dari products.json / migrasi)"""
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.write() as db:
                 await db.execute("DELETE FROM products")
-                for p in products:
-                    await db.execute(
-                        "INSERT INTO products (id, name, price, category, spotlight) VALUES (?, ?, ?, ?, ?)",
-                        (p["id"], p["name"], p["price"], p["category"], p.get("spotlight", 0)),
-                    )
-                await db.commit()
+                await db.executemany(
+                    "INSERT INTO products (id, name, price, category, spotlight) VALUES (?, ?, ?, ?, ?)",
+                    [self._product_row(p) for p in products],
+                )
+            self.catalog_version += 1
             print(f"✓ Saved {len(products)} products")
             return True
         except Exception as e:
@@ -163,8 +770,7 @@ class SimpleDB:
 
     async def load_products(self):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
-                db.row_factory = aiosqlite.Row
+            async with self.pool.read() as db:
                 cursor = await db.execute("SELECT * FROM products ORDER BY spotlight DESC, id")
                 rows = await cursor.fetchall()
             products = [
@@ -177,14 +783,47 @@ class SimpleDB:
             print(f"❌ Error load products: {e}")
             return []
 
+    async def upsert_product(self, product):
+        """Insert atau update satu produk; spotlight produk lama tidak diubah (pakai set_spotlight)"""
+        try:
+            async with self.pool.write() as db:
+                await db.execute(self._UPSERT_PRODUCT, self._product_row(product))
+            self.catalog_version += 1
+            return True
+        except Exception as e:
+            print(f"❌ Error upsert product: {e}")
+            return False
+
+    async def upsert_products(self, products):
+        """Versi bulk upsert_product untuk import, satu transaksi"""
+        try:
+            async with self.pool.write() as db:
+                await db.executemany(self._UPSERT_PRODUCT, [self._product_row(p) for p in products])
+            self.catalog_version += 1
+            print(f"✓ Upsert {len(products)} products")
+            return True
+        except Exception as e:
+            print(f"❌ Error upsert products: {e}")
+            return False
+
+    async def delete_product(self, item_id):
+        try:
+            async with self.pool.write() as db:
+                await db.execute("DELETE FROM products WHERE id = ?", (item_id,))
+            self.catalog_version += 1
+            return True
+        except Exception as e:
+            print(f"❌ Error delete product: {e}")
+            return False
+
     async def set_spotlight(self, item_id, value: int):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.write() as db:
                 await db.execute(
                     "UPDATE products SET spotlight = ? WHERE id = ?",
                     (value, item_id),
                 )
-                await db.commit()
+            self.catalog_version += 1
             return True
         except Exception as e:
             print(f"❌ Error set spotlight: {e}")
@@ -194,12 +833,11 @@ class SimpleDB:
 
     async def add_blacklist(self, user_id, reason=""):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.write() as db:
                 await db.execute(
                     "INSERT OR REPLACE INTO blacklist (user_id, reason, timestamp) VALUES (?, ?, ?)",
                     (user_id, reason, datetime.now().isoformat()),
                 )
-                await db.commit()
             return True
         except Exception as e:
             print(f"❌ Error blacklist: {e}")
@@ -207,9 +845,8 @@ class SimpleDB:
 
     async def remove_blacklist(self, user_id):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.write() as db:
                 await db.execute("DELETE FROM blacklist WHERE user_id = ?", (user_id,))
-                await db.commit()
             return True
         except Exception as e:
             print(f"❌ Error hapus blacklist: {e}")
@@ -217,7 +854,7 @@ class SimpleDB:
 
     async def is_blacklisted(self, user_id):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.read() as db:
                 cursor = await db.execute(
                     "SELECT 1 FROM blacklist WHERE user_id = ?", (user_id,)
                 )
@@ -228,7 +865,7 @@ class SimpleDB:
 
     async def get_blacklist(self):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.read() as db:
                 cursor = await db.execute(
                     "SELECT user_id, reason, timestamp FROM blacklist ORDER BY timestamp DESC"
                 )
@@ -241,7 +878,7 @@ class SimpleDB:
 
     async def save_ticket(self, channel_id, user_id, items, total_price):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.write() as db:
                 await db.execute(
                     '''INSERT OR REPLACE INTO active_tickets
                        (channel_id, user_id, items, total_price, status, created_at)
@@ -255,7 +892,6 @@ class SimpleDB:
                         datetime.now().isoformat(),
                     ),
                 )
-                await db.commit()
             return True
         except Exception as e:
             print(f"❌ Error save ticket: {e}")
@@ -263,8 +899,7 @@ class SimpleDB:
 
     async def get_active_tickets(self):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
-                db.row_factory = aiosqlite.Row
+            async with self.pool.read() as db:
                 cursor = await db.execute(
                     'SELECT * FROM active_tickets WHERE status = "OPEN"'
                 )
@@ -277,6 +912,10 @@ class SimpleDB:
                     "payment_method": row["payment_method"],
                     "status": row["status"],
                     "created_at": row["created_at"],
+                    "qty_msg_id": int(row["qty_msg_id"]) if row["qty_msg_id"] else None,
+                    "reminder_message_id": int(row["reminder_message_id"]) if row["reminder_message_id"] else None,
+                    "last_activity": row["last_activity"],
+                    "reminded_at": row["reminded_at"],
                 }
                 for row in rows
             }
@@ -286,7 +925,7 @@ class SimpleDB:
 
     async def update_ticket_status(self, channel_id, status, payment_method=None):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.write() as db:
                 if payment_method:
                     await db.execute(
                         "UPDATE active_tickets SET status = ?, payment_method = ? WHERE channel_id = ?",
@@ -297,45 +936,60 @@ class SimpleDB:
                         "UPDATE active_tickets SET status = ? WHERE channel_id = ?",
                         (status, channel_id),
                     )
-                await db.commit()
             return True
         except Exception as e:
             print(f"❌ Error update ticket: {e}")
             return False
 
-    async def update_ticket_items(self, channel_id, items):
+    async def update_tickets(self, rows):
+        """Simpan items, total, last_activity beberapa tiket sekaligus: [(channel_id, items, total_price, last_activity), ...]"""
+        try:
+            async with self.pool.write() as db:
+                await db.executemany(
+                    "UPDATE active_tickets SET items = ?, total_price = ?, last_activity = ? WHERE channel_id = ?",
+                    [
+                        (json.dumps(items), total_price, last_activity, channel_id)
+                        for channel_id, items, total_price, last_activity in rows
+                    ],
+                )
+            return True
+        except Exception as e:
+            print(f"❌ Error update tickets: {e}")
+            return False
+
+    async def update_ticket_reminder(self, channel_id, message_id, reminded_at):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.write() as db:
                 await db.execute(
-                    "UPDATE active_tickets SET items = ? WHERE channel_id = ?",
-                    (json.dumps(items), channel_id),
+                    "UPDATE active_tickets SET reminder_message_id = ?, reminded_at = ? WHERE channel_id = ?",
+                    (str(message_id) if message_id else None, reminded_at, channel_id),
                 )
-                await db.commit()
             return True
         except Exception as e:
-            print(f"❌ Error update items: {e}")
+            print(f"❌ Error update ticket reminder: {e}")
             return False
 
-    async def update_ticket_total(self, channel_id, total_price):
+    async def update_ticket_message(self, channel_id, field, message_id):
+        """Simpan id pesan milik bot di tiket (qty_msg_id / reminder_message_id)"""
+        if field not in ("qty_msg_id", "reminder_message_id"):
+            raise ValueError(f"Kolom tidak dikenal: {field}")
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.write() as db:
                 await db.execute(
-                    "UPDATE active_tickets SET total_price = ? WHERE channel_id = ?",
-                    (total_price, channel_id),
+                    f"UPDATE active_tickets SET {field} = ? WHERE channel_id = ?",
+                    (str(message_id) if message_id else None, channel_id),
                 )
-                await db.commit()
             return True
         except Exception as e:
-            print(f"❌ Error update total: {e}")
+            print(f"❌ Error update ticket message: {e}")
             return False
 
     async def delete_ticket(self, channel_id):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.write() as db:
                 await db.execute(
                     "DELETE FROM active_tickets WHERE channel_id = ?", (channel_id,)
                 )
-                await db.commit()
             return True
         except Exception as e:
             print(f"❌ Error delete ticket: {e}")
@@ -345,12 +999,11 @@ class SimpleDB:
 
     async def save_auto_react(self, channel_id, emojis):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.write() as db:
                 await db.execute(
                     "INSERT OR REPLACE INTO auto_react (channel_id, emojis) VALUES (?, ?)",
                     (str(channel_id), json.dumps(emojis)),
                 )
-                await db.commit()
             return True
         except Exception as e:
             print(f"❌ Error save auto_react: {e}")
@@ -358,11 +1011,10 @@ class SimpleDB:
 
     async def delete_auto_react(self, channel_id):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.write() as db:
                 await db.execute(
                     "DELETE FROM auto_react WHERE channel_id = ?", (str(channel_id),)
                 )
-                await db.commit()
             return True
         except Exception as e:
             print(f"❌ Error delete auto_react: {e}")
@@ -370,7 +1022,7 @@ class SimpleDB:
 
     async def load_auto_react(self):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.read() as db:
                 cursor = await db.execute("SELECT channel_id, emojis FROM auto_react")
                 rows = await cursor.fetchall()
             return {int(row[0]): json.loads(row[1]) for row in rows}
@@ -380,12 +1032,11 @@ class SimpleDB:
 
     async def save_auto_react_all(self, channel_id, emojis):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.write() as db:
                 await db.execute(
                     "INSERT OR REPLACE INTO auto_react_all (channel_id, emojis) VALUES (?, ?)",
                     (str(channel_id), json.dumps(emojis)),
                 )
-                await db.commit()
             return True
         except Exception as e:
             print(f"❌ Error save auto_react_all: {e}")
@@ -393,11 +1044,10 @@ class SimpleDB:
 
     async def delete_auto_react_all(self, channel_id):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.write() as db:
                 await db.execute(
                     "DELETE FROM auto_react_all WHERE channel_id = ?", (str(channel_id),)
                 )
-                await db.commit()
             return True
         except Exception as e:
             print(f"❌ Error delete auto_react_all: {e}")
@@ -405,7 +1055,7 @@ class SimpleDB:
 
     async def load_auto_react_all(self):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.read() as db:
                 cursor = await db.execute(
                     "SELECT channel_id, emojis FROM auto_react_all"
                 )
@@ -417,33 +1067,155 @@ class SimpleDB:
 
     # ─── Settings / Invoice Counter ──────────────────────────────
 
-    async def get_setting(self, key):
+    async def next_invoice_number(self, date=None):
+        """Ambil nomor urut invoice berikutnya untuk tanggal (YYYYMMDD) secara atomik"""
+        date = date or datetime.now().strftime("%Y%m%d")
+        async with self.pool.write() as db:
+            cursor = await db.execute(
+                '''INSERT INTO invoice_sequence (date, counter) VALUES (?, 1)
+                   ON CONFLICT (date) DO UPDATE SET counter = counter + 1
+                   RETURNING counter''',
+                (date,),
+            )
+            row = await cursor.fetchone()
+            await cursor.close()
+        return row[0]
+
+    async def get_setting(self, key, default=None, cast=None):
+        """Baca dari cache settings (tanpa query). cast mis. int; kosong / gagal cast → default"""
+        value = self.settings.get(key)
+        if value is None:
+            return default
+        if cast is None:
+            return value
         try:
-            async with aiosqlite.connect(self.db_name) as db:
-                cursor = await db.execute("SELECT value FROM settings WHERE key = ?", (key,))
-                row = await cursor.fetchone()
-                return row[0] if row else None
-        except Exception:
-            return None
+            return cast(value)
+        except (TypeError, ValueError):
+            return default
 
     async def set_setting(self, key, value):
         try:
-            async with aiosqlite.connect(self.db_name) as db:
+            async with self.pool.write() as db:
                 await db.execute(
                     "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
                     (key, value),
                 )
-                await db.commit()
+            self.settings[key] = value
             return True
         except Exception as e:
             print(f"❌ Error set setting: {e}")
             return False
 
+    # ─── Scheduled Jobs ──────────────────────────────────────────
+
+    async def save_scheduled_job(self, name, next_run, last_run, last_duration_ms, runs, failures, last_error):
+        try:
+            async with self.pool.write() as db:
+                await db.execute(
+                    '''INSERT OR REPLACE INTO scheduled_jobs
+                       (name, next_run, last_run, last_duration_ms, runs, failures, last_error)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                    (name, next_run, last_run, last_duration_ms, runs, failures, last_error),
+                )
+            return True
+        except Exception as e:
+            print(f"❌ Error simpan scheduled job: {e}")
+            return False
+
+    async def load_scheduled_jobs(self):
+        try:
+            async with self.pool.read() as db:
+                cursor = await db.execute("SELECT * FROM scheduled_jobs")
+                rows = await cursor.fetchall()
+            return {row["name"]: dict(row) for row in rows}
+        except Exception as e:
+            print(f"❌ Error load scheduled jobs: {e}")
+            return {}
+
+    # ─── Catalog Pins ────────────────────────────────────────────
+
+    async def save_catalog_pin(self, channel_id, guild_id, message_ids, content_hash=None):
+        try:
+            async with self.pool.write() as db:
+                await db.execute(
+                    "INSERT OR REPLACE INTO catalog_pins (channel_id, guild_id, message_ids, content_hash) VALUES (?, ?, ?, ?)",
+                    (str(channel_id), str(guild_id), json.dumps([str(m) for m in message_ids]), content_hash),
+                )
+            return True
+        except Exception as e:
+            print(f"❌ Error simpan catalog pin: {e}")
+            return False
+
+    async def load_catalog_pins(self):
+        try:
+            async with self.pool.read() as db:
+                cursor = await db.execute("SELECT * FROM catalog_pins")
+                rows = await cursor.fetchall()
+            return {
+                row["channel_id"]: {
+                    "guild_id": row["guild_id"],
+                    "message_ids": json.loads(row["message_ids"] or "[]"),
+                    "content_hash": row["content_hash"],
+                }
+                for row in rows
+            }
+        except Exception as e:
+            print(f"❌ Error load catalog pins: {e}")
+            return {}
+
+    async def delete_catalog_pin(self, channel_id):
+        try:
+            async with self.pool.write() as db:
+                await db.execute("DELETE FROM catalog_pins WHERE channel_id = ?", (str(channel_id),))
+            return True
+        except Exception as e:
+            print(f"❌ Error hapus catalog pin: {e}")
+            return False
+
+    # ─── User Names ──────────────────────────────────────────────
+
+    async def get_user_names(self, user_ids, max_age=None):
+        """Nama tersimpan untuk user_ids → {user_id: name}; yang lebih tua dari max_age (detik) dilewati"""
+        user_ids = [str(uid) for uid in user_ids]
+        if not user_ids:
+            return {}
+        min_epoch = _epoch(datetime.now()) - max_age if max_age else 0
+        names = {}
+        try:
+            async with self.pool.read() as db:
+                # Dipecah per 500 supaya tidak melewati batas parameter SQLite
+                for i in range(0, len(user_ids), 500):
+                    chunk = user_ids[i:i + 500]
+                    cursor = await db.execute(
+                        f'''SELECT user_id, name FROM user_names
+                           WHERE user_id IN ({",".join("?" * len(chunk))}) AND updated_at >= ?''',
+                        (*chunk, min_epoch),
+                    )
+                    names.update({row["user_id"]: row["name"] for row in await cursor.fetchall()})
+        except Exception as e:
+            print(f"❌ Error ambil user_names: {e}")
+        return names
+
+    async def save_user_names(self, names):
+        if not names:
+            return True
+        now = _epoch(datetime.now())
+        try:
+            async with self.pool.write() as db:
+                await db.executemany(
+                    "INSERT OR REPLACE INTO user_names (user_id, name, updated_at) VALUES (?, ?, ?)",
+                    [(str(uid), name, now) for uid, name in names.items()],
+                )
+            return True
+        except Exception as e:
+            print(f"❌ Error simpan user_names: {e}")
+            return False
+
     # ─── Giveaways ───────────────────────────────────────────────
 
     async def save_giveaway(self, message_id, channel_id, guild_id, prize, end_time, winners, host_id, participants):
         import json
-        async with aiosqlite.connect(self.db_name) as db:
+        async with self.pool.write() as db:
             await db.execute(
                 "INSERT OR REPLACE INTO giveaways VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
                 (
@@ -452,25 +1224,22 @@ class SimpleDB:
                     json.dumps(list(participants)),
                 )
             )
-            await db.commit()
 
     async def update_giveaway_participants(self, message_id, participants):
         import json
-        async with aiosqlite.connect(self.db_name) as db:
+        async with self.pool.write() as db:
             await db.execute(
                 "UPDATE giveaways SET participants=? WHERE message_id=?",
                 (json.dumps(list(participants)), str(message_id))
             )
-            await db.commit()
 
     async def delete_giveaway(self, message_id):
-        async with aiosqlite.connect(self.db_name) as db:
+        async with self.pool.write() as db:
             await db.execute("UPDATE giveaways SET ended=1 WHERE message_id=?", (str(message_id),))
-            await db.commit()
 
     async def load_ended_giveaway(self, message_id):
         import json
-        async with aiosqlite.connect(self.db_name) as db:
+        async with self.pool.read() as db:
             cursor = await db.execute("SELECT * FROM giveaways WHERE message_id=? AND ended=1", (str(message_id),))
             row = await cursor.fetchone()
             if not row:
@@ -490,8 +1259,11 @@ class SimpleDB:
         import json
         from datetime import datetime
         result = {}
-        async with aiosqlite.connect(self.db_name) as db:
-            cursor = await db.execute("SELECT * FROM giveaways WHERE ended=0 OR ended IS NULL")
+        async with self.pool.read() as db:
+            cursor = await db.execute(
+                """SELECT message_id, channel_id, guild_id, prize, end_time, winners, host_id, participants
+                   FROM giveaways WHERE ended=0 OR ended IS NULL"""
+            )
             rows = await cursor.fetchall()
             for row in rows:
                 message_id, channel_id, guild_id, prize, end_time, winners, host_id, participants = row
@@ -508,32 +1280,251 @@ class SimpleDB:
 
 
 class ProductsCache:
+    """Pemilik tunggal Catalog produk, di-refresh berdasarkan versi (bukan TTL).
 
-    def __init__(self, db: SimpleDB, cache_duration=300):
+    Setiap tulis produk di SimpleDB menaikkan db.catalog_version. Pembaca yang
+    melihat versi berbeda tetap dapat catalog lama (tidak menunggu) sementara
+    satu task refresh dijalankan di background; refresh yang bersamaan
+    digabung ke task yang sama.
+    """
+
+    def __init__(self, db: SimpleDB):
         self.db = db
-        self.data = []
+        self.catalog = Catalog()
+        self.version = -1
         self.last_update = None
-        self.cache_duration = cache_duration
+        self._refresh_task = None
+        self._listeners = []
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0, "last_refresh_ms": 0.0}
 
-    def is_expired(self):
-        if not self.last_update:
-            return True
-        return (datetime.now() - self.last_update).seconds > self.cache_duration
+    def add_listener(self, callback):
+        """callback(catalog) dipanggil (sinkron) setiap catalog baru dipasang"""
+        self._listeners.append(callback)
 
-    async def load_from_db(self):
-        self.data = await self.db.load_products()
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self):
+        for callback in list(self._listeners):
+            try:
+                callback(self.catalog)
+            except Exception as e:
+                print(f"❌ Error listener catalog: {e}")
+
+    @property
+    def is_stale(self):
+        return self.version != self.db.catalog_version
+
+    async def _load(self):
+        # Versi dibaca sebelum load: tulis yang masuk selama load akan memicu refresh berikutnya
+        version = self.db.catalog_version
+        start = time.perf_counter()
+        self.catalog = Catalog(await self.db.load_products())
+        self.version = version
         self.last_update = datetime.now()
-        print(f"✓ Cache refreshed: {len(self.data)} products")
-        return self.data
+        self.stats["refreshes"] += 1
+        self.stats["last_refresh_ms"] = (time.perf_counter() - start) * 1000
+        print(f"✓ Cache refreshed: {len(self.catalog)} products")
+        self._notify()
+        return self.catalog
 
-    async def get_products(self, force_refresh=False):
-        if force_refresh or self.is_expired():
-            return await self.load_from_db()
-        return self.data
+    def _schedule_refresh(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._load())
+        return self._refresh_task
+
+    async def get_catalog(self, force_refresh=False):
+        if force_refresh:
+            return await self.refresh()
+        if not self.is_stale:
+            self.stats["hits"] += 1
+            return self.catalog
+        self.stats["misses"] += 1
+        task = self._schedule_refresh()
+        if self.last_update is None:
+            # Belum pernah dimuat → tidak ada catalog lama untuk dipakai, tunggu load pertama
+            return await asyncio.shield(task)
+        return self.catalog
+
+    def set_catalog(self, catalog):
+        """Pasang catalog hasil satu perubahan lokal yang sudah disimpan ke DB.
+
+        Kalau ternyata ada tulis lain sejak catalog ini diambil, catalog tetap
+        dipasang tapi refresh dijadwalkan supaya perubahan lain ikut termuat.
+        """
+        self.catalog = catalog
+        self.last_update = datetime.now()
+        if self.db.catalog_version == self.version + 1:
+            self.version = self.db.catalog_version
+        else:
+            self._schedule_refresh()
+        self._notify()
 
     async def refresh(self):
-        return await self.load_from_db()
+        """Muat ulang sekarang (menunggu), dipakai saat startup / refresh manual"""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            await asyncio.shield(self._refresh_task)
+        return await asyncio.shield(self._schedule_refresh())
 
     def invalidate(self):
-        self.last_update = None
-        print("📦 Cache invalidated")
\ No newline at end of file
+        """Tandai catalog basi untuk perubahan di luar SimpleDB (mis. import_products.py)"""
+        self.version = -1
+        self._schedule_refresh()
+        print("📦 Cache invalidated")
+
+    def get_stats(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / total if total else 0.0,
+            "version": self.version,
+            "products": len(self.catalog),
+        }
+
+
+class ActiveTicketStore(MutableMapping):
+    """bot.active_tickets: dict channel_id → tiket, plus index user_id.
+
+    Baca/tulis item seperti dict biasa tetap jalan dan index ikut di-update.
+    add / remove / close / set_status sekalian simpan ke DB.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._tickets = {}
+        self._by_user = {}    # user_id: set(channel_id)
+        self._dirty = set()   # channel_id yang items/total-nya belum disimpan
+        self._flush_task = None
+
+    # ── Mapping ──
+
+    def __getitem__(self, channel_id):
+        return self._tickets[channel_id]
+
+    def __setitem__(self, channel_id, ticket):
+        if channel_id in self._tickets:
+            self._unindex(channel_id)
+        ticket["channel_id"] = channel_id
+        self._tickets[channel_id] = ticket
+        self._index(channel_id)
+
+    def __delitem__(self, channel_id):
+        self._unindex(channel_id)
+        del self._tickets[channel_id]
+
+    def __iter__(self):
+        return iter(self._tickets)
+
+    def __len__(self):
+        return len(self._tickets)
+
+    def __contains__(self, channel_id):
+        return channel_id in self._tickets
+
+    def _index(self, channel_id):
+        ticket = self._tickets[channel_id]
+        self._by_user.setdefault(ticket["user_id"], set()).add(channel_id)
+
+    def _unindex(self, channel_id):
+        ticket = self._tickets[channel_id]
+        self._discard(self._by_user, ticket["user_id"], channel_id)
+
+    @staticmethod
+    def _discard(index, key, channel_id):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.discard(channel_id)
+            if not bucket:
+                del index[key]
+
+    # ── Query ──
+
+    def open_ticket_of(self, user_id):
+        """Tiket OPEN milik user ini, atau None"""
+        for channel_id in self._by_user.get(user_id, ()):
+            ticket = self._tickets[channel_id]
+            if ticket.get("status", "OPEN") == "OPEN":
+                return ticket
+        return None
+
+    # ── Persist ──
+
+    async def load(self):
+        self.clear()
+        for channel_id, ticket in (await self.db.get_active_tickets()).items():
+            self[channel_id] = ticket
+        return len(self)
+
+    async def add(self, ticket):
+        await self.db.save_ticket(
+            channel_id=ticket["channel_id"],
+            user_id=ticket["user_id"],
+            items=ticket["items"],
+            total_price=ticket["total_price"],
+        )
+        self[ticket["channel_id"]] = ticket
+
+    async def remove(self, channel_id):
+        """Hapus tiket (batal / kosong) dari memori dan DB"""
+        self._dirty.discard(channel_id)
+        self.pop(channel_id, None)
+        await self.db.delete_ticket(channel_id)
+
+    async def close(self, channel_id):
+        """Tiket selesai: keluar dari memori, di DB ditandai CLOSED"""
+        await self.flush(channel_id)
+        self.pop(channel_id, None)
+        await self.db.update_ticket_status(channel_id, "CLOSED", None)
+
+    def touch(self, channel_id):
+        """Catat aktivitas di tiket (pesan / klik); menunda reminder, disimpan lewat write-behind"""
+        ticket = self._tickets.get(channel_id)
+        if ticket is not None:
+            ticket["last_activity"] = int(time.time())
+            self.mark_dirty(channel_id)
+
+    def mark_dirty(self, channel_id):
+        """Items/total tiket berubah di memori; disimpan (write-behind) setelah TICKET_FLUSH_DELAY"""
+        self._dirty.add(channel_id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        while self._dirty:
+            await asyncio.sleep(TICKET_FLUSH_DELAY)
+            await self.flush()
+
+    async def flush(self, channel_id=None):
+        """Simpan tiket yang belum tersimpan (semua, atau satu tiket) dalam satu transaksi"""
+        ids = [channel_id] if channel_id is not None else list(self._dirty)
+        rows = []
+        for c in ids:
+            if c in self._dirty:
+                self._dirty.discard(c)
+                ticket = self._tickets.get(c)
+                if ticket:
+                    rows.append((c, ticket["items"], ticket["total_price"], ticket.get("last_activity")))
+        if rows:
+            await self.db.update_tickets(rows)
+
+    async def set_message_id(self, channel_id, field, message_id):
+        """Ingat id pesan qty / reminder tiket (ikut tersimpan, jadi bisa diedit langsung setelah restart)"""
+        ticket = self._tickets.get(channel_id)
+        if ticket is not None:
+            ticket[field] = message_id
+        await self.db.update_ticket_message(channel_id, field, message_id)
+
+    async def set_reminder(self, channel_id, message_id, reminded_at):
+        ticket = self._tickets.get(channel_id)
+        if ticket is not None:
+            ticket["reminder_message_id"] = message_id
+            ticket["reminded_at"] = reminded_at
+        await self.db.update_ticket_reminder(channel_id, message_id, reminded_at)
+
+    async def set_status(self, channel_id, status, payment_method=None):
+        ticket = self._tickets[channel_id]
+        ticket["status"] = status
+        if payment_method:
+            ticket["payment_method"] = payment_method
+        await self.db.update_ticket_status(channel_id, status, payment_method)
@@ -0,0 +1,88 @@
+import time
+import logging
+import discord
+from utils import RecentKeys
+
+logger = logging.getLogger(__name__)
+
+
+class ComponentRouter:
+    """Satu pintu untuk semua klik komponen (button/select), di-dispatch dari bot.on_interaction.
+
+    Cog mendaftarkan handler per prefix custom_id (mis. "buy_") atau custom_id
+    persis. Lookup memotong custom_id di setiap "_" dari yang terpanjang, jadi
+    cukup beberapa lookup dict — bukan rantai startswith di setiap cog.
+    Handler dipanggil sebagai handler(interaction, sisa_custom_id).
+    """
+
+    def __init__(self, dedup=None):
+        self._exact = {}
+        self._prefix = {}
+        self._view_owned = set()
+        self.dedup = dedup if dedup is not None else RecentKeys()
+        self.stats = {}
+
+    def register(self, key, handler, exact=False):
+        table = self._exact if exact else self._prefix
+        if key in table:
+            raise ValueError(f"Handler untuk '{key}' sudah terdaftar")
+        table[key] = handler
+        self.stats.setdefault(key, {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+
+    def unregister(self, key):
+        self._exact.pop(key, None)
+        self._prefix.pop(key, None)
+
+    def mark_view_owned(self, custom_id):
+        """custom_id yang sudah ditangani persistent View (bot.add_view) → router tidak ikut memproses"""
+        self._view_owned.add(custom_id)
+
+    def resolve(self, custom_id):
+        """(key, handler, sisa) untuk custom_id, atau None kalau tidak ada yang cocok"""
+        handler = self._exact.get(custom_id)
+        if handler:
+            return custom_id, handler, ""
+        end = len(custom_id)
+        while True:
+            end = custom_id.rfind("_", 0, end)
+            if end < 0:
+                return None
+            key = custom_id[:end + 1]
+            handler = self._prefix.get(key)
+            if handler:
+                return key, handler, custom_id[end + 1:]
+
+    async def dispatch(self, interaction: discord.Interaction):
+        if interaction.type != discord.InteractionType.component:
+            return False
+        custom_id = interaction.data.get("custom_id", "")
+        if custom_id in self._view_owned:
+            return False
+        route = self.resolve(custom_id)
+        if not route:
+            return False
+
+        # Cegah interaction diproses dua kali (race condition)
+        if self.dedup.seen(interaction.id):
+            return False
+
+        key, handler, arg = route
+        stat = self.stats[key]
+        start = time.perf_counter()
+        try:
+            await handler(interaction, arg)
+        except Exception:
+            stat["errors"] += 1
+            logger.exception(f"Error handler komponen '{key}' (custom_id={custom_id})")
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            stat["calls"] += 1
+            stat["total_ms"] += elapsed
+            stat["max_ms"] = max(stat["max_ms"], elapsed)
+        return True
+
+    def get_stats(self):
+        return {
+            key: {**stat, "avg_ms": stat["total_ms"] / stat["calls"] if stat["calls"] else 0.0}
+            for key, stat in self.stats.items()
+        }
@@ -0,0 +1,202 @@
+import time
+import heapq
+import random
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """Satu pekerjaan terjadwal: interval (tiap N detik), daily (jam tertentu), atau once (sekali)"""
+
+    def __init__(self, name, func, kind, interval=None, at=None, when=None,
+                 jitter=0, catch_up=False, persist=True, first_delay=0):
+        self.name = name
+        self.func = func
+        self.kind = kind
+        self.interval = interval
+        self.at = at              # (jam, menit) untuk daily
+        self.when = when          # epoch untuk once
+        self.jitter = jitter
+        self.catch_up = catch_up  # jadwal terlewat saat bot mati → jalankan sekali begitu start
+        self.persist = persist    # next_run & statistik disimpan di tabel scheduled_jobs
+        self.first_delay = first_delay
+        self.next_run = None
+        self.running = False
+        self.last_run = None
+        self.last_duration_ms = None
+        self.runs = 0
+        self.failures = 0
+        self.last_error = None
+
+    def next_after(self, now):
+        """Epoch jadwal berikutnya setelah `now` (+ jitter acak)"""
+        if self.kind == "once":
+            return self.when
+        if self.kind == "interval":
+            base = now + self.interval
+        else:
+            hour, minute = self.at
+            dt = datetime.fromtimestamp(now).replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if dt.timestamp() <= now:
+                dt += timedelta(days=1)
+            base = dt.timestamp()
+        return base + (random.uniform(0, self.jitter) if self.jitter else 0)
+
+    def first_run(self, now):
+        if self.kind == "interval":
+            return now + self.first_delay
+        return self.next_after(now)
+
+    def describe(self):
+        if self.kind == "interval":
+            return f"tiap {self.interval}s"
+        if self.kind == "daily":
+            return f"harian {self.at[0]:02d}:{self.at[1]:02d}"
+        return "sekali"
+
+
+class Scheduler:
+    """Satu loop untuk semua background task bot (pengganti while True: sleep di tiap fungsi).
+
+    Jadwal disimpan di heap (next_run, seq, name); loop tidur sampai job
+    terdekat jatuh tempo atau ada job baru. Job jalan sebagai task terpisah
+    dan tidak pernah overlap dengan dirinya sendiri: jadwal berikutnya baru
+    dihitung setelah selesai. Entri heap yang sudah tidak cocok (job dibatalkan
+    / dijadwal ulang) dibuang saat muncul di puncak.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._jobs = {}
+        self._heap = []
+        self._seq = 0
+        self._wake = asyncio.Event()
+        self._task = None
+        self._running_tasks = set()
+
+    # ── Registrasi ──
+
+    def every(self, name, seconds, func, jitter=0, first_delay=0, catch_up=True, persist=True):
+        return self._add(Job(name, func, "interval", interval=seconds, jitter=jitter,
+                             first_delay=first_delay, catch_up=catch_up, persist=persist))
+
+    def daily(self, name, hour, minute, func, jitter=0, catch_up=True, persist=True):
+        return self._add(Job(name, func, "daily", at=(hour, minute), jitter=jitter,
+                             catch_up=catch_up, persist=persist))
+
+    def once(self, name, when, func):
+        """Jalankan func sekali pada `when` (datetime). Nama yang sama → jadwal lama diganti"""
+        return self._add(Job(name, func, "once", when=when.timestamp(), persist=False))
+
+    def cancel(self, name):
+        """Hapus job; run yang sedang jalan dibiarkan selesai"""
+        return self._jobs.pop(name, None) is not None
+
+    def _add(self, job):
+        # Nama sama = ganti job lama (aman kalau registrasi terpanggil dua kali)
+        self._jobs[job.name] = job
+        if self.started:
+            self._schedule(job, job.first_run(time.time()))
+        return job
+
+    def _schedule(self, job, when):
+        job.next_run = when
+        self._seq += 1
+        heapq.heappush(self._heap, (when, self._seq, job.name))
+        self._wake.set()
+
+    # ── Loop ──
+
+    @property
+    def started(self):
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Mulai loop; dipanggil lagi saat sudah jalan (mis. reconnect) tidak membuat loop kedua"""
+        if self.started:
+            return
+        saved = await self.db.load_scheduled_jobs()
+        now = time.time()
+        for job in self._jobs.values():
+            row = saved.get(job.name) if job.persist else None
+            if not row or row["next_run"] is None:
+                when = job.first_run(now)
+            else:
+                job.last_run = row["last_run"]
+                job.last_duration_ms = row["last_duration_ms"]
+                job.runs = row["runs"] or 0
+                job.failures = row["failures"] or 0
+                job.last_error = row["last_error"]
+                when = row["next_run"]
+                if when <= now:
+                    # Terlewat saat bot mati: jalankan sekali sekarang (catch-up) atau lompat ke jadwal berikutnya
+                    when = now if job.catch_up else job.next_after(now)
+            job.next_run = when
+            self._seq += 1
+            self._heap.append((when, self._seq, job.name))
+        heapq.heapify(self._heap)
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"✓ Scheduler jalan: {len(self._jobs)} job")
+
+    async def stop(self):
+        tasks = [t for t in (self._task, *self._running_tasks) if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    async def _loop(self):
+        while True:
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                when, _, name = heapq.heappop(self._heap)
+                job = self._jobs.get(name)
+                if job is None or job.next_run != when or job.running:
+                    continue
+                job.next_run = None
+                task = asyncio.create_task(self._run(job))
+                self._running_tasks.add(task)
+                task.add_done_callback(self._running_tasks.discard)
+            delay = self._heap[0][0] - now if self._heap else 3600
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(delay, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, job):
+        job.running = True
+        job.last_run = time.time()
+        start = time.perf_counter()
+        try:
+            await job.func()
+            job.last_error = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.failures += 1
+            job.last_error = f"{type(e).__name__}: {e}"[:200]
+            logger.exception(f"Job '{job.name}' gagal")
+        finally:
+            job.running = False
+            job.runs += 1
+            job.last_duration_ms = (time.perf_counter() - start) * 1000
+        if self._jobs.get(job.name) is not job:
+            return  # dibatalkan / diganti selama jalan
+        if job.kind == "once":
+            self._jobs.pop(job.name, None)
+        else:
+            self._schedule(job, job.next_after(time.time()))
+        if job.persist:
+            await self.db.save_scheduled_job(
+                job.name, job.next_run, job.last_run, job.last_duration_ms,
+                job.runs, job.failures, job.last_error,
+            )
+
+    # ── Info ──
+
+    def get_jobs(self):
+        return sorted(self._jobs.values(), key=lambda j: (j.kind == "once", j.name))
@@ -0,0 +1,37 @@
+import asyncio
+from datetime import datetime
+
+from database import SimpleDB
+from utils import generate_invoice_number
+
+
+async def _allocate(path, count, pools=1):
+    dbs = [SimpleDB(str(path)) for _ in range(pools)]
+    await dbs[0].init_db()
+    try:
+        return await asyncio.gather(*(generate_invoice_number(dbs[i % pools]) for i in range(count)))
+    finally:
+        for db in dbs:
+            await db.close()
+
+
+def test_parallel_allocations_unique_and_contiguous(tmp_path):
+    invoices = asyncio.run(_allocate(tmp_path / "store.db", 200))
+    today = datetime.now().strftime("%Y%m%d")
+    assert len(set(invoices)) == 200
+    assert sorted(invoices) == [f"INV-{today}-{n:04d}" for n in range(1, 201)]
+
+
+def test_parallel_allocations_across_pools(tmp_path):
+    # Dua SimpleDB (koneksi writer terpisah) ke file yang sama, mis. bot + script lain
+    invoices = asyncio.run(_allocate(tmp_path / "store.db", 300, pools=2))
+    counters = sorted(int(inv.rsplit("-", 1)[1]) for inv in invoices)
+    assert counters == list(range(1, 301))
+
+
+def test_sequence_continues_after_reopen(tmp_path):
+    path = tmp_path / "store.db"
+    first = asyncio.run(_allocate(path, 50))
+    second = asyncio.run(_allocate(path, 50))
+    assert not set(first) & set(second)
+    assert max(int(inv.rsplit("-", 1)[1]) for inv in second) == 100
@@ -0,0 +1,72 @@
+import pytest
+
+import utils
+from utils import RecentKeys
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(utils.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_first_seen_then_duplicate(clock):
+    keys = RecentKeys(maxsize=10, ttl=60)
+    assert keys.seen("a") is False
+    assert keys.seen("a") is True
+    assert "a" in keys
+    assert len(keys) == 1
+
+
+def test_ttl_expiry(clock):
+    keys = RecentKeys(maxsize=10, ttl=60)
+    keys.seen("a")
+    clock[0] += 30
+    keys.seen("b")
+    clock[0] += 30
+    # "a" tepat kedaluwarsa, "b" masih 30 detik lagi
+    assert "a" not in keys
+    assert "b" in keys
+    assert keys.seen("a") is False
+    clock[0] += 31
+    assert "b" not in keys
+    assert "a" in keys
+
+
+def test_maxsize_evicts_oldest_first(clock):
+    keys = RecentKeys(maxsize=3, ttl=60)
+    for key in ("a", "b", "c", "d"):
+        keys.seen(key)
+    assert len(keys) == 3
+    assert "a" not in keys
+    assert all(k in keys for k in ("b", "c", "d"))
+    keys.seen("e")
+    assert "b" not in keys
+    assert list(keys._keys) == ["c", "d", "e"]
+
+
+def test_reinsert_refreshes_position(clock):
+    keys = RecentKeys(maxsize=3, ttl=60)
+    for key in ("a", "b", "c"):
+        keys.seen(key)
+    assert keys.seen("a") is True
+    keys.seen("d")
+    # "a" dicatat ulang → yang terbuang "b", bukan "a"
+    assert list(keys._keys) == ["c", "a", "d"]
+    assert "b" not in keys
+
+
+def test_reinsert_refreshes_ttl(clock):
+    keys = RecentKeys(maxsize=10, ttl=60)
+    keys.seen("a")
+    clock[0] += 50
+    keys.seen("b")
+    assert keys.seen("a") is True
+    clock[0] += 20
+    # ttl "a" mulai lagi saat dicatat ulang; "b" juga masih hidup
+    assert "a" in keys
+    assert "b" in keys
+    clock[0] += 41
+    assert "a" not in keys
+    assert "b" not in keys
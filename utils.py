@@ -1,13 +1,14 @@
 import os
 import json
 import html
+import time
 import shutil
 import asyncio
 import discord
 from datetime import datetime
+from collections import OrderedDict
 from config import (
     STAFF_ROLE_NAME,
-    INVOICE_COUNTER_FILE,
     BROADCAST_COOLDOWN_FILE,
     BACKUP_DIR,
     TRANSCRIPT_DIR,
@@ -51,38 +52,19 @@ async def handle_error(interaction_or_ctx, error, title="❌ Error", ephemeral=T
 
 # ─── Invoice ─────────────────────────────────────────────────────────────────
 
-def generate_invoice_number(db=None):
+async def generate_invoice_number(db):
     today = datetime.now().strftime("%Y%m%d")
-    try:
-        with open(INVOICE_COUNTER_FILE, "r") as f:
-            data = json.loads(f.read().strip())
-            if data.get("date") == today:
-                counter = data["counter"] + 1
-            else:
-                counter = 1
-    except Exception:
-        counter = 1
-    with open(INVOICE_COUNTER_FILE, "w") as f:
-        f.write(json.dumps({"date": today, "counter": counter}))
+    counter = await db.next_invoice_number(today)
     return f"INV-{today}-{counter:04d}"
+
+
 async def send_invoice(guild, transaction_data, db):
     channel = await get_log_channel(guild)
     user = guild.get_member(int(transaction_data["user_id"]))
     user_name = user.display_name if user else "Unknown"
 
-    # Invoice counter dari database (lebih aman dari file txt)
-    today = datetime.now().strftime("%Y%m%d")
-    counter_data = await db.get_setting("invoice_counter")
-    try:
-        data = json.loads(counter_data) if counter_data else {}
-        if data.get("date") == today:
-            counter = data["counter"] + 1
-        else:
-            counter = 1
-    except Exception:
-        counter = 1
-    await db.set_setting("invoice_counter", json.dumps({"date": today, "counter": counter}))
-    invoice_num = f"INV-{today}-{counter:04d}"
+    # Nomor invoice dari sequence di database (atomik, aman untuk !done bersamaan)
+    invoice_num = await generate_invoice_number(db)
 
     transaction_data["invoice"] = invoice_num
     transaction_data["timestamp"] = datetime.now()
@@ -246,8 +228,104 @@ def format_items(items):
 
 
 async def get_item_by_id(item_id, products_cache):
-    products = await products_cache.get_products()
-    return next((p for p in products if p["id"] == item_id), None)
+    return (await products_cache.get_catalog()).get(item_id)
+
+
+# ─── Dedup ───────────────────────────────────────────────────────────────────
+
+class RecentKeys:
+    """Set terbatas untuk de-dup: ingat key selama ttl detik, maksimal maxsize key.
+
+    OrderedDict menjaga urutan masuk; karena ttl sama untuk semua key, urutan
+    masuk = urutan kedaluwarsa, jadi buang yang expired / terlama cukup dari depan.
+    """
+
+    def __init__(self, maxsize=1000, ttl=900):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._keys = OrderedDict()  # key: waktu kedaluwarsa (monotonic)
+
+    def _expire(self, now):
+        while self._keys:
+            key, expires = next(iter(self._keys.items()))
+            if expires > now:
+                break
+            self._keys.popitem(last=False)
+
+    def seen(self, key):
+        """True kalau key sudah tercatat dalam ttl terakhir; kalau belum, catat dan return False.
+        Key yang muncul lagi dicatat ulang (pindah ke belakang, ttl mulai dari awal)"""
+        now = time.monotonic()
+        self._expire(now)
+        found = key in self._keys
+        self._keys[key] = now + self.ttl
+        if found:
+            self._keys.move_to_end(key)
+            return True
+        if len(self._keys) > self.maxsize:
+            self._keys.popitem(last=False)
+        return False
+
+    def __contains__(self, key):
+        self._expire(time.monotonic())
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+
+# ─── User Names ──────────────────────────────────────────────────────────────
+
+class UserNameResolver:
+    """Resolve user_id → username: cache member guild, lalu tabel user_names, baru API.
+
+    Satu instance dipakai untuk satu export, jadi tiap user_id paling banyak
+    di-fetch sekali; fetch ke API dibatasi `concurrency` request sekaligus.
+    """
+
+    def __init__(self, bot, guild=None, ttl=7 * 24 * 3600, concurrency=5):
+        self.bot = bot
+        self.guild = guild
+        self.ttl = ttl
+        self.names = {}
+        self._sem = asyncio.Semaphore(concurrency)
+
+    async def _fetch(self, user_id):
+        async with self._sem:
+            try:
+                user = await self.bot.fetch_user(int(user_id))
+                return user_id, user.name
+            except Exception:
+                return user_id, None
+
+    async def resolve_many(self, user_ids):
+        pending = {str(uid) for uid in user_ids} - self.names.keys()
+        if not pending:
+            return self.names
+        fresh = {}
+        for uid in list(pending):
+            member = self.guild.get_member(int(uid)) if self.guild else None
+            user = member or self.bot.get_user(int(uid))
+            if user:
+                fresh[uid] = user.name
+        pending -= fresh.keys()
+        if pending:
+            stored = await self.bot.db.get_user_names(pending, max_age=self.ttl)
+            self.names.update(stored)
+            pending -= stored.keys()
+        if pending:
+            results = await asyncio.gather(*(self._fetch(uid) for uid in pending))
+            for uid, name in results:
+                if name:
+                    fresh[uid] = name
+                else:
+                    self.names[uid] = "Unknown"
+        self.names.update(fresh)
+        await self.bot.db.save_user_names(fresh)
+        return self.names
+
+    async def resolve(self, user_id):
+        return (await self.resolve_many([user_id]))[str(user_id)]
 
 
 # ─── Product File ─────────────────────────────────────────────────────────────
@@ -290,11 +368,13 @@ def cleanup_old_backups(keep=5):
         files = [
             os.path.join(BACKUP_DIR, f)
             for f in os.listdir(BACKUP_DIR)
-            if f.endswith(".db")
+            if f.endswith(".db") or f.endswith(".db.gz")
         ]
         files.sort(key=os.path.getmtime, reverse=True)
         for old_file in files[keep:]:
             os.remove(old_file)
+            if os.path.exists(old_file + ".sha256"):
+                os.remove(old_file + ".sha256")
             print(f"🗑️ Hapus backup lama: {os.path.basename(old_file)}")
     except Exception as e:
         print(f"❌ Gagal cleanup backup: {e}")